@@ -1,16 +1,22 @@
 import bpy
-import bmesh
 from bpy.props import IntProperty, FloatProperty
 
 from ..utils import (
     clamp,
     VEC_DOWN,
+    GRID_EPS,
+    face_normal,
     sort_edges,
     sort_faces,
+    is_parallel,
+    edge_vector,
     get_scaled_unit,
     edge_is_vertical,
     calc_edge_median,
     calc_faces_median,
+    geometry_cache,
+    translate_verts,
+    face_center_median,
     calc_face_dimensions,
 )
 
@@ -83,55 +89,81 @@ def get_array_split_edges(afaces):
     return result
 
 
+def get_split_line_verts(edge):
+    """Verts of the split edge and the edges that continue it in a straight line
+
+    Splitting the array faces into grids cuts their split edges into pieces, which all
+    have to move together.
+    """
+    direction = edge_vector(edge)
+    verts = set(edge.verts)
+    stack = list(verts)
+    while stack:
+        v = stack.pop()
+        for e in v.link_edges:
+            other = e.other_vert(v)
+            if other in verts:
+                continue
+            # -- zero length edges come from empty grid rows, they stay on the line
+            if e.calc_length() < GRID_EPS or is_parallel(edge_vector(e), direction):
+                verts.add(other)
+                stack.append(other)
+    return verts
+
+
 def spread_array(bm, split_edges, split_faces, max_width, prop):
     """perform spreading for array faces"""
     if prop.count == 1:
         return
 
-    normal = split_faces[0].normal.copy()
-    median = calc_faces_median(split_faces)
-
-    right = normal.cross(VEC_DOWN)
-    split_edges = sort_edges(split_edges, right)
-    split_faces = sort_faces(split_faces, right)
-
-    # -- map each split edge to its neighbouring faces
-    edge_neighbour_face_map = {
-        edge: [split_faces[idx], split_faces[idx + 1]]
-        for idx, edge in enumerate(split_edges)
-    }
-
-    def get_all_splitface_verts(f):
-        corner_verts = list(f.verts)
-        split_verts = []
-        for v in corner_verts:
-            split_edge = [e for e in v.link_edges if e not in f.edges].pop()
-            if edge_is_vertical(split_edge):
-                split_verts.append(split_edge.other_vert(v))
-        return corner_verts + split_verts
-
-    # XXX Fixme if you can
-    # HACK(ranjian0) Setting spread to 1.0 causes multigroup jitters
-    prop.spread = clamp(prop.spread, -1, 0.9999)
-
-    # -- spread the array faces
-    for f in split_faces:
-        fm = f.calc_center_median()
-        vts = get_all_splitface_verts(f)
-
-        diff = Vector((fm - median).to_tuple(3))
-        spread_factor = (max_width - prop.width) * (diff.length / max_width)
-        if prop.spread > 0:
-            spread_factor /= prop.count - 1
-        bmesh.ops.translate(
-            bm, verts=vts, vec=diff.normalized() * prop.spread * spread_factor
-        )
-
-    # -- move the split edges to the middle of their neighbour faces
-    for edge in split_edges:
-        neighbours = edge_neighbour_face_map[edge]
-        nmedian = calc_faces_median(neighbours)
-
-        diff = nmedian - calc_edge_median(edge)
-        diff.z = 0  # XXX prevent vertical offset from influencing split edges
-        bmesh.ops.translate(bm, verts=edge.verts, vec=diff)
+    # -- the sort keys and medians below ask for the same faces/edges again
+    with geometry_cache(bm):
+        normal = face_normal(split_faces[0])
+        median = calc_faces_median(split_faces)
+
+        right = normal.cross(VEC_DOWN)
+        split_edges = sort_edges(split_edges, right)
+        split_faces = sort_faces(split_faces, right)
+
+        # -- map each split edge to its neighbouring faces
+        edge_neighbour_face_map = {
+            edge: [split_faces[idx], split_faces[idx + 1]]
+            for idx, edge in enumerate(split_edges)
+        }
+
+        def get_all_splitface_verts(f):
+            corner_verts = list(f.verts)
+            split_verts = []
+            for v in corner_verts:
+                for e in v.link_edges:
+                    if e not in f.edges and edge_is_vertical(e):
+                        split_verts.append(e.other_vert(v))
+            return corner_verts + split_verts
+
+        # XXX Fixme if you can
+        # HACK(ranjian0) Setting spread to 1.0 causes multigroup jitters
+        prop.spread = clamp(prop.spread, -1, 0.9999)
+
+        # -- spread the array faces
+        offsets = []
+        for f in split_faces:
+            fm = face_center_median(f)
+            vts = get_all_splitface_verts(f)
+
+            diff = Vector((fm - median).to_tuple(3))
+            spread_factor = (max_width - prop.width) * (diff.length / max_width)
+            if prop.spread > 0:
+                spread_factor /= prop.count - 1
+            offsets.append((vts, diff.normalized() * prop.spread * spread_factor))
+        translate_verts(offsets)
+
+        # -- move the split edges to the middle of their (spread) neighbour faces
+        offsets = []
+        for edge in split_edges:
+            neighbours = edge_neighbour_face_map[edge]
+            nmedian = calc_faces_median(neighbours)
+
+            diff = nmedian - calc_edge_median(edge)
+            diff.z = 0  # XXX prevent vertical offset from influencing split edges
+            offsets.append((get_split_line_verts(edge), diff))
+        translate_verts(offsets)
@@ -11,6 +11,7 @@ from .materialgroup import MaterialGroup, add_faces_to_group, add_material_group
 from ..utils import (
     select,
     local_xyz,
+    MeshRegion,
     bm_to_obj,
     crash_safe,
     bm_from_obj,
@@ -19,8 +20,9 @@ from ..utils import (
     calc_verts_median,
     get_bounding_verts,
     calc_face_dimensions,
+    cleanup_remove_doubles,
     bmesh_from_active_object,
-    subdivide_face_vertically,
+    subdivide_face_into_grid,
     subdivide_face_horizontally,
     get_selected_face_dimensions,
 )
@@ -118,27 +120,28 @@ def place_custom_object(context, prop, custom_obj):
     with bmesh_from_active_object(context) as bm:
         faces = [face for face in bm.faces if face.select]
 
-        for face in faces:
-            face.select = False
-            # No support for upward/downward facing
-            if face.normal.z:
-                popup_message(
-                    "Faces with Z+/Z- normals not supported!",
-                    title="Invalid Face Selection",
+        with MeshRegion(bm, faces) as region:
+            for face in faces:
+                face.select = False
+                # No support for upward/downward facing
+                if face.normal.z:
+                    popup_message(
+                        "Faces with Z+/Z- normals not supported!",
+                        title="Invalid Face Selection",
+                    )
+                    continue
+
+                array_faces = subdivide_face_horizontally(
+                    bm, face, widths=[prop.size_offset.size.x] * prop.count
                 )
-                continue
-
-            array_faces = subdivide_face_horizontally(
-                bm, face, widths=[prop.size_offset.size.x] * prop.count
-            )
-            for aface in array_faces:
-                # -- Create split and place obj
-                split_face = create_split(
-                    bm, aface, prop.size_offset.size, prop.size_offset.offset
-                )
-                place_object_on_face(bm, split_face, custom_obj, prop)
+                for aface in array_faces:
+                    # -- Create split and place obj
+                    split_face = create_split(
+                        bm, aface, prop.size_offset.size, prop.size_offset.offset
+                    )
+                    region.add(place_object_on_face(bm, split_face, custom_obj, prop))
 
-        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+        cleanup_remove_doubles(bm, region, dist=0.0001)
 
 
 def transfer_materials(from_object, to_obj):
@@ -182,7 +185,6 @@ def duplicate_into_bm(bm, obj):
     return [f for f in bm.faces if f.index >= max_index]
 
 
-# TODO(ranjian0) refactor function (duplicated from create_window_split)
 def create_split(bm, face, size, offset):
     """Use properties from SplitOffset to subdivide face into regular quads"""
     wall_w, wall_h = calc_face_dimensions(face)
@@ -192,21 +194,20 @@ def create_split(bm, face, size, offset):
         size.x,
         wall_w / 2 - offset.x - size.x / 2,
     ]
-    h_faces = subdivide_face_horizontally(bm, face, h_widths)
     # vertical split
-    v_width = [
+    v_widths = [
         wall_h / 2 + offset.y - size.y / 2,
         size.y,
         wall_h / 2 - offset.y - size.y / 2,
     ]
-    v_faces = subdivide_face_vertically(bm, h_faces[1], v_width)
-
-    return v_faces[1]
+    rows = subdivide_face_into_grid(bm, face, h_widths, v_widths)
+    return rows[1][1]
 
 
 def place_object_on_face(bm, face, custom_obj, prop):
-    """Place the custom_object mesh flush on the face"""
+    """Place the custom_object mesh flush on the face, returns the faces of the mesh"""
     # XXX get mesh from custom_obj into bm
+    bm.faces.index_update()  # -- faces made by the split have no index yet
     face_idx = face.index
     custom_faces = duplicate_into_bm(bm, custom_obj)
     face = [f for f in bm.faces if f.index == face_idx].pop()  # restore reference
@@ -226,6 +227,7 @@ def place_object_on_face(bm, face, custom_obj, prop):
 
     # cleanup
     bmesh.ops.delete(bm, geom=[face], context="FACES_ONLY")
+    return custom_faces
 
 
 def get_coplanar_faces(face_verts):
@@ -22,12 +22,16 @@ from ...utils import (
     local_xyz,
     sort_verts,
     valid_ngon,
+    MeshRegion,
     ngon_to_quad,
     get_top_edges,
     get_top_faces,
     get_bottom_faces,
     extrude_face_region,
     calc_face_dimensions,
+    cleanup_face_normals,
+    cleanup_remove_doubles,
+    subdivide_face_into_grid,
     subdivide_face_vertically,
     subdivide_face_horizontally,
 )
@@ -35,27 +39,28 @@ from ...utils import (
 
 def create_door(bm, faces, prop):
     """Create door from face selection"""
-    for face in faces:
-        face.select = False
-        if not valid_ngon(face):
-            ngon_to_quad(bm, face)
-
-        clamp_array_count(face, prop)
-        array_faces = subdivide_face_horizontally(
-            bm, face, widths=[prop.width] * prop.count
-        )
-        max_width = calc_face_dimensions(array_faces[0])[0]
-
-        split_edges = get_array_split_edges(array_faces)
-        split_faces = [create_door_split(bm, aface, prop) for aface in array_faces]
-        spread_array(bm, split_edges, split_faces, max_width, prop)
-
-        for face in split_faces:
-            door, arch = create_door_frame(bm, face, prop)
-            create_door_fill(bm, door, prop)
-            if prop.add_arch:
-                fill_arch(bm, arch, prop)
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+    with MeshRegion(bm, faces) as region:
+        for face in faces:
+            face.select = False
+            if not valid_ngon(face):
+                ngon_to_quad(bm, face)
+
+            clamp_array_count(face, prop)
+            array_faces = subdivide_face_horizontally(
+                bm, face, widths=[prop.width] * prop.count
+            )
+            max_width = calc_face_dimensions(array_faces[0])[0]
+
+            split_edges = get_array_split_edges(array_faces)
+            split_faces = [create_door_split(bm, aface, prop) for aface in array_faces]
+            spread_array(bm, split_edges, split_faces, max_width, prop)
+
+            for face in split_faces:
+                door, arch = create_door_frame(bm, face, prop)
+                create_door_fill(bm, door, prop)
+                if prop.add_arch:
+                    fill_arch(bm, arch, prop)
+    cleanup_remove_doubles(bm, region, dist=0.0001)
 
     nulfaces = find_faces_without_matgroup(bm)
     add_faces_to_group(bm, nulfaces, MaterialGroup.WALLS)
@@ -73,12 +78,10 @@ def create_door_split(bm, face, prop):
         width,
         wall_w / 2 + offset.x - width / 2,
     ]
-    h_faces = subdivide_face_horizontally(bm, face, h_widths)
     # vertical split
-    v_width = [height, wall_h - height]
-    v_faces = subdivide_face_vertically(bm, h_faces[1], v_width)
-
-    return v_faces[0]
+    v_widths = [height, wall_h - height]
+    rows = subdivide_face_into_grid(bm, face, h_widths, v_widths)
+    return rows[0][1]
 
 
 def create_door_frame(bm, face, prop):
@@ -108,7 +111,7 @@ def create_door_frame(bm, face, prop):
         # -- postprocess merge loose split verts
         merge_loose_split_verts(bm, door_face, prop)
 
-    bmesh.ops.recalc_face_normals(bm, faces=list(bm.faces))
+    cleanup_face_normals(bm, {door_face, arch_face, *frame_faces} - {None})
 
     # add depths
     if prop.add_arch:
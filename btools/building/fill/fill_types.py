@@ -16,6 +16,7 @@ from ...utils import (
     calc_edge_median,
     calc_face_dimensions,
     filter_vertical_edges,
+    cleanup_remove_doubles,
     filter_horizontal_edges,
 )
 
@@ -264,7 +265,8 @@ def subdivide_face_into_quads(bm, face, cuts_x, cuts_y):
     if cuts_y > 0:
         res = bmesh.ops.subdivide_edges(bm, edges=h_edges + edges, cuts=cuts_y)
         edges.extend(filter_geom(res["geom_inner"], BMEdge))
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.01)
+    faces = {f for ed in validate(edges + v_edges + h_edges) for f in ed.link_faces}
+    cleanup_remove_doubles(bm, faces, dist=0.01)
     return list({f for ed in validate(edges) for f in ed.link_faces})
 
 
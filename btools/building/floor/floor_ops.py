@@ -10,6 +10,7 @@ from ..materialgroup import (
 
 from ...utils import (
     select,
+    util_mesh,
     crash_safe,
     get_edit_mesh,
 )
@@ -45,8 +46,11 @@ def build(context, prop):
     me = get_edit_mesh()
     bm = bmesh.from_edit_mesh(me)
 
-    # XXX Fix normals if they are inverted(Z-)
-    for f in bm.faces:
+    # XXX Fix normals if they are inverted(Z-), only on the faces that get floors
+    faces = bm.faces
+    if not util_mesh.FULL_MESH_CLEANUP:
+        faces = [f for f in bm.faces if f.select] or bm.faces
+    for f in faces:
         if f.normal.z < 0:
             f.normal_flip()
 
@@ -5,25 +5,29 @@ from mathutils import Vector
 from ..materialgroup import MaterialGroup, add_faces_to_group
 from ...utils import (
     equal,
+    MeshRegion,
     filter_geom,
     closest_faces,
+    EdgeTable,
     extrude_face_region,
-    filter_vertical_edges,
     create_cube_without_faces,
     create_plane,
     calc_verts_median,
     get_top_faces,
     edge_vector,
     vec_equal,
-    is_parallel
+    is_parallel,
+    cleanup_face_normals,
 )
 
 
 def create_floors(bm, faces, prop):
     """Create extrusions of floor geometry from a floorplan"""
-    slabs, walls, roof = extrude_slabs_and_floors(bm, faces, prop)
+    with MeshRegion(bm, faces) as region:
+        slabs, walls, roof, columns = extrude_slabs_and_floors(bm, faces, prop)
+        region.add(columns)
 
-    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+    cleanup_face_normals(bm, region)
 
     add_faces_to_group(bm, slabs, MaterialGroup.SLABS)
     add_faces_to_group(bm, walls, MaterialGroup.WALLS)
@@ -38,7 +42,7 @@ def extrude_slabs_and_floors(bm, faces, prop):
 
     if len(faces) > 1:
         faces = bmesh.ops.dissolve_faces(bm, faces=faces)["region"]
-    create_columns(bm, faces[-1], prop)
+    columns = create_columns(bm, faces[-1], prop)
 
     # extrude vertically
     if prop.add_slab:
@@ -90,15 +94,16 @@ def extrude_slabs_and_floors(bm, faces, prop):
                 )
             walls += surrounding_faces
 
-    return slabs, walls, faces
+    return slabs, walls, faces, columns
 
 
 def dissolve_flat_edges(bm, faces):
+    table = EdgeTable(e for f in faces for e in f.edges)
     flat_edges = list(
         {
             e
             for f in faces
-            for e in filter_vertical_edges(f.edges)
+            for e in table.filter_vertical(f.edges)
             if len(e.link_faces) > 1 and equal(e.calc_face_angle(), 0)
         }
     )
@@ -124,8 +129,9 @@ def get_flat_faces(faces, visited):
 
 
 def create_columns(bm, face, prop):
+    """Create columns at the corners of face, returns the column faces"""
     if not prop.add_columns:
-        return
+        return []
 
     res = []
     decoration_h = (prop.floor_height-prop.decoration_padding*(prop.decoration_nb - 1))/prop.decoration_nb
@@ -232,3 +238,4 @@ def create_columns(bm, face, prop):
 
     columns = list({f for v in res for f in v.link_faces})
     add_faces_to_group(bm, columns, MaterialGroup.COLUMNS)
+    return columns
@@ -22,12 +22,16 @@ from ...utils import (
     sort_faces,
     sort_verts,
     valid_ngon,
+    MeshRegion,
     ngon_to_quad,
     get_top_faces,
     get_top_edges,
     popup_message,
     calc_face_dimensions,
+    cleanup_face_normals,
+    cleanup_remove_doubles,
     filter_horizontal_edges,
+    subdivide_face_into_grid,
     subdivide_face_horizontally,
     subdivide_face_vertically,
 )
@@ -51,32 +55,33 @@ def create_multigroup(bm, faces, prop):
         popup_message("No valid components", "Components Error")
         return False
 
-    for face in faces:
-        face.select = False
-        if not valid_ngon(face):
-            ngon_to_quad(bm, face)
+    with MeshRegion(bm, faces) as region:
+        for face in faces:
+            face.select = False
+            if not valid_ngon(face):
+                ngon_to_quad(bm, face)
 
-        clamp_array_count(face, prop)
-        array_faces = subdivide_face_horizontally(
-            bm, face, widths=[prop.width] * prop.count
-        )
-        max_width = calc_face_dimensions(array_faces[0])[0]
-
-        split_edges = get_array_split_edges(array_faces)
-        split_faces = [
-            create_multigroup_split(bm, aface, prop) for aface in array_faces
-        ]
-        spread_array(bm, split_edges, split_faces, max_width, prop)
-
-        for face in split_faces:
-            doors, windows, arch = create_multigroup_frame(bm, face, prop)
-            for door in doors:
-                fill_face(bm, door, prop, "DOOR")
-            for window in windows:
-                fill_face(bm, window, prop, "WINDOW")
-            if prop.add_arch:
-                fill_arch(bm, arch, prop)
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+            clamp_array_count(face, prop)
+            array_faces = subdivide_face_horizontally(
+                bm, face, widths=[prop.width] * prop.count
+            )
+            max_width = calc_face_dimensions(array_faces[0])[0]
+
+            split_edges = get_array_split_edges(array_faces)
+            split_faces = [
+                create_multigroup_split(bm, aface, prop) for aface in array_faces
+            ]
+            spread_array(bm, split_edges, split_faces, max_width, prop)
+
+            for face in split_faces:
+                doors, windows, arch = create_multigroup_frame(bm, face, prop)
+                for door in doors:
+                    fill_face(bm, door, prop, "DOOR")
+                for window in windows:
+                    fill_face(bm, window, prop, "WINDOW")
+                if prop.add_arch:
+                    fill_arch(bm, arch, prop)
+    cleanup_remove_doubles(bm, region, dist=0.0001)
 
     nulfaces = find_faces_without_matgroup(bm)
     add_faces_to_group(bm, nulfaces, MaterialGroup.WALLS)
@@ -94,7 +99,6 @@ def create_multigroup_split(bm, face, prop):
         width,
         wall_w / 2 + offset.x - width / 2,
     ]
-    h_faces = subdivide_face_horizontally(bm, face, h_widths)
     # vertical split
     size_y = min(
         height, wall_h - SPLIT_EPS
@@ -102,16 +106,15 @@ def create_multigroup_split(bm, face, prop):
 
     if "d" not in prop.components:
         # XXX Only windows, use the y offset
-        v_width = [
+        v_widths = [
             wall_h / 2 + offset.y + size_y / 2,
             wall_h / 2 - offset.y - size_y / 2,
         ]
     else:
         # XXX A door exists, split starts from bottom, no need for y offset
-        v_width = [size_y, wall_h - size_y]
-    v_faces = subdivide_face_vertically(bm, h_faces[1], v_width)
-
-    return v_faces[0]
+        v_widths = [size_y, wall_h - size_y]
+    rows = subdivide_face_into_grid(bm, face, h_widths, v_widths)
+    return rows[0][1]
 
 
 def create_multigroup_frame(bm, face, prop):
@@ -151,7 +154,8 @@ def create_multigroup_frame(bm, face, prop):
             bm, sort_faces(window_faces, right), sort_faces(door_faces, right), prop
         )
 
-    bmesh.ops.recalc_face_normals(bm, faces=list(bm.faces))
+    frame_region = {arch_face, *door_faces, *window_faces, *frame_faces} - {None}
+    cleanup_face_normals(bm, frame_region)
 
     # add depths
     if prop.add_arch:
@@ -8,7 +8,10 @@ from ..utils import (
     VEC_DOWN,
     sort_faces,
     sort_verts,
+    face_normal,
     get_edit_mesh,
+    geometry_cache,
+    face_center_median,
 )
 
 
@@ -16,7 +19,8 @@ def remove(context):
     me = get_edit_mesh()
     bm = bmesh.from_edit_mesh(me)
 
-    bound_faces = get_faces_in_selection_bounds(bm)
+    with geometry_cache(bm):
+        bound_faces = get_faces_in_selection_bounds(bm)
     cornerv, midv = get_bounding_verts(bound_faces)
 
     bmesh.ops.delete(bm, geom=bound_faces, context="FACES")
@@ -31,16 +35,14 @@ def get_faces_in_selection_bounds(bm):
     """Determine all faces that lie within the bounds of selected faces"""
     faces = [f for f in bm.faces if f.select]
 
-    normal = faces[0].normal.copy()
+    normal = face_normal(faces[0])
     L, R = normal.cross(VEC_UP), normal.cross(VEC_DOWN)
     faces = sort_faces(faces, R)
-    start, finish = faces[0].calc_center_median(), faces[-1].calc_center_median()
+    start, finish = face_center_median(faces[0]), face_center_median(faces[-1])
 
-    faces_left = filter(
-        lambda f: L.dot(f.calc_center_median()) < L.dot(start), bm.faces
-    )
+    faces_left = filter(lambda f: L.dot(face_center_median(f)) < L.dot(start), bm.faces)
     faces_mid = filter(
-        lambda f: R.dot(f.calc_center_median()) < R.dot(finish), faces_left
+        lambda f: R.dot(face_center_median(f)) < R.dot(finish), faces_left
     )
     valid_normals = [
         normal.to_tuple(2),
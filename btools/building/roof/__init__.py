@@ -1,8 +1,27 @@
 import bpy
+from bpy.app.handlers import persistent
 
 from .roof_ops import BTOOLS_OT_add_roof
 from .roof_props import RoofProperty
+from .roof_types import roof_topology_cache
 
 classes = (RoofProperty, BTOOLS_OT_add_roof)
 
-register_roof, unregister_roof = bpy.utils.register_classes_factory(classes)
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+
+@persistent
+def clear_roof_topology_cache(*args):
+    """Drop the roofs of the previous file, they are never redone in this one"""
+    roof_topology_cache.clear()
+
+
+def register_roof():
+    register_classes()
+    bpy.app.handlers.load_post.append(clear_roof_topology_cache)
+
+
+def unregister_roof():
+    if clear_roof_topology_cache in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_roof_topology_cache)
+    unregister_classes()
@@ -45,6 +45,12 @@ class RoofProperty(bpy.types.PropertyGroup):
         description="Outset of roof hangs",
     )
 
+    clamp_outset: BoolProperty(
+        name="Clamp Outset",
+        default=False,
+        description="Limit outset to the largest value that keeps the roof valid",
+    )
+
     height: FloatProperty(
         name="Height",
         min=get_scaled_unit(0.01),
@@ -89,10 +95,13 @@ class RoofProperty(bpy.types.PropertyGroup):
             col = box.column(align=True)
             col.prop(self, "thickness")
             col.prop(self, "outset")
+            if self.gable_type == "BOX":
+                col.prop(self, "clamp_outset")
             col.prop(self, "height")
 
         else:
             col = box.column(align=True)
             col.prop(self, "thickness")
             col.prop(self, "outset")
+            col.prop(self, "clamp_outset")
             col.prop(self, "height")
@@ -1,6 +1,8 @@
+import math
 import bmesh
+import bisect
 import mathutils
-import numpy as np
+from collections import defaultdict, OrderedDict
 from bmesh.types import BMVert, BMFace
 from mathutils import Vector
 
@@ -10,25 +12,37 @@ from ...utils import (
     select,
     validate,
     edge_vector,
-    skeletonize,
+    skeleton_cache,
+    skeletonize_cached,
+    max_safe_outset,
     filter_geom,
     popup_message,
     edge_is_vertical,
     calc_edge_median,
+    get_selection_groups,
+    cleanup_face_normals,
 )
 
+# -- skeletonize separate roofs in a process pool, opt-in since the workers have to
+# -- import btools (see iter_skeletonize)
+PARALLEL_SKELETONIZE = False
+
 
 def create_roof(bm, faces, prop):
     """Create roof types"""
+    # -- every connected region of the selection gets its own hip/gable roof
+    groups = [faces]
+    if prop.type in ("GABLE", "HIP"):
+        groups = get_selection_groups(bm) or groups
     select(faces, False)
     if prop.type == "FLAT":
         create_flat_roof(bm, faces, prop)
     elif prop.type == "GABLE":
         add_material_group(MaterialGroup.ROOF_HANGS)
-        create_gable_roof(bm, faces, prop)
+        create_gable_roof(bm, groups, prop)
     elif prop.type == "HIP":
         add_material_group(MaterialGroup.ROOF_HANGS)
-        create_hip_roof(bm, faces, prop)
+        create_hip_roof(bm, groups, prop)
 
 
 @map_new_faces(MaterialGroup.ROOF)
@@ -52,11 +66,22 @@ def create_flat_roof(bm, faces, prop):
         bmesh.ops.delete(bm, geom=top_face, context="FACES")
 
 
-def create_gable_roof(bm, faces, prop):
-    """Create gable roof"""
+def create_gable_roof(bm, groups, prop):
+    """Create a gable roof over each group of faces"""
+    regions = [gable_roof_base(bm, faces, prop) for faces in groups]
+    for roof_faces in create_skeleton_roofs(bm, regions, prop.height, True):
+        if prop.gable_type == "OPEN":
+            gable_process_open(bm, roof_faces, prop)
+        elif prop.gable_type == "BOX":
+            gable_process_box(bm, roof_faces, prop)
+
+
+def gable_roof_base(bm, faces, prop):
+    """Create the base of a gable roof over faces, see skeleton_roof_base"""
     # -- create initial outset for box gable roof
     if prop.gable_type == "BOX":
-        faces = extrude_and_outset(bm, faces, prop.thickness, prop.outset)
+        outset = roof_outset(faces, prop, zero_gradient=True)
+        faces = extrude_and_outset(bm, faces, prop.thickness, outset)
         link_faces = {f for fa in faces for e in fa.edges for f in e.link_faces}
         all_edges = {e for f in link_faces for e in f.edges}
         bmesh.ops.delete(bm, geom=list(link_faces), context="FACES")
@@ -75,6 +100,28 @@ def create_gable_roof(bm, faces, prop):
     # -- dissolve if faces are many
     if len(faces) > 1:
         faces = bmesh.ops.dissolve_faces(bm, faces=faces, use_verts=True).get("region")
+    return skeleton_roof_base(bm, faces)
+
+
+def create_hip_roof(bm, groups, prop):
+    """Create a hip roof over each group of faces"""
+    regions = [hip_roof_base(bm, faces, prop) for faces in groups]
+    create_skeleton_roofs(bm, regions, prop.height)
+
+
+def hip_roof_base(bm, faces, prop):
+    """Create the base of a hip roof over faces, see skeleton_roof_base"""
+    roof_hang = map_new_faces(MaterialGroup.ROOF_HANGS)(extrude_and_outset)
+    faces = roof_hang(bm, faces, prop.thickness, roof_outset(faces, prop))
+    return skeleton_roof_base(bm, faces)
+
+
+def skeleton_roof_base(bm, faces):
+    """Prepare the top face of a roof base for the straight skeleton
+
+    Returns the faces, their median, the edges of the top face and its points in
+    anti-clockwise order (required by straight skeleton)
+    """
     face = faces[-1]
     median = face.calc_center_median()
 
@@ -82,58 +129,197 @@ def create_gable_roof(bm, faces, prop):
     dissolve_lone_verts(bm, face, list(face.edges))
     original_edges = validate(face.edges)
 
-    # -- get verts in anti-clockwise order (required by straight skeleton)
-    verts = [v for v in sort_verts_by_loops(face)]
-    points = [v.co.to_tuple()[:2] for v in verts]
+    points = [v.co.to_tuple()[:2] for v in sort_verts_by_loops(face)]
+    return faces, median, original_edges, points
 
-    # -- compute straight skeleton
-    skeleton = skeletonize(points, [], zero_gradient=True)
-    bmesh.ops.delete(bm, geom=faces, context="FACES_ONLY")
 
-    height_scale = prop.height / max([arc.height for arc in skeleton])
+def skeletonize_regions(polygons, zero_gradient=False):
+    """Compute the (cached) straight skeleton of every polygon"""
+    if PARALLEL_SKELETONIZE and len(polygons) > 1:
+        return skeleton_cache.skeletonize_many(polygons, zero_gradient)
+    return [skeletonize_cached(p, [], zero_gradient) for p in polygons]
 
-    # -- create edges and vertices
-    skeleton_edges = create_skeleton_verts_and_edges(
-        bm, skeleton, original_edges, median, height_scale
-    )
 
-    # -- create faces
-    roof_faces = create_skeleton_faces(bm, original_edges, skeleton_edges)
-    if prop.gable_type == "OPEN":
-        gable_process_open(bm, roof_faces, prop)
-    elif prop.gable_type == "BOX":
-        gable_process_box(bm, roof_faces, prop)
+class RoofTopologyCache:
+    """
+    LRU cache of the roof faces built over a footprint, keyed like skeleton_cache.
 
+    Verts are stored relative to the footprint origin, with z as a fraction of the
+    roof height, so a redo that only changes the height rebuilds the faces without
+    skeletonizing, joining and walking the footprint again.
+    """
 
-def create_hip_roof(bm, faces, prop):
-    """Create a hip roof"""
-    # -- create base for hip roof
-    roof_hang = map_new_faces(MaterialGroup.ROOF_HANGS)(extrude_and_outset)
-    faces = roof_hang(bm, faces, prop.thickness, prop.outset)
-    face = faces[-1]
-    median = face.calc_center_median()
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key, origin, faces, original_edges, median, height):
+        """Store the faces of a roof built by create_skeleton_roof"""
+        footprint = {v for e in validate(original_edges) for v in e.verts}
+        ox, oy = origin
+        index = {}
+        verts = []
+        for face in faces:
+            for v in face.verts:
+                if v not in index:
+                    index[v] = len(verts)
+                    fraction = (v.co.z - median.z) / height
+                    verts.append((v.co.x - ox, v.co.y - oy, fraction, v in footprint))
+
+        self._entries[key] = (
+            verts,
+            [tuple(index[v] for v in face.verts) for face in faces],
+        )
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._entries),
+        )
 
-    # -- remove verts that are between two parallel edges
-    dissolve_lone_verts(bm, face, list(face.edges))
-    original_edges = validate(face.edges)
+    def clear(self):
+        self.hits = self.misses = 0
+        self._entries.clear()
 
-    # -- get verts in anti-clockwise order
-    verts = [v for v in sort_verts_by_loops(face)]
-    points = [v.co.to_tuple()[:2] for v in verts]
 
-    # -- compute straight skeleton
-    skeleton = skeletonize(points, [])
-    bmesh.ops.delete(bm, geom=faces, context="FACES_ONLY")
+roof_topology_cache = RoofTopologyCache()
 
-    height_scale = prop.height / max([arc.height for arc in skeleton])
 
-    # -- create edges and vertices
+def create_skeleton_roofs(bm, regions, height, zero_gradient=False):
+    """Create the roof over each region of skeleton_roof_base, return their faces
+
+    Footprints in roof_topology_cache are rebuilt from it, only the others are
+    skeletonized.
+    """
+    keys = [skeleton_cache.key(points, None, zero_gradient) for *_, points in regions]
+    # -- one region per footprint, its copies are rebuilt from what it stores
+    first = {}
+    for i, (key, _) in enumerate(keys):
+        if key not in roof_topology_cache:
+            first.setdefault(key, i)
+    missing = list(first.values())
+    polygons = [regions[i][-1] for i in missing]
+    skeletons = dict(zip(missing, skeletonize_regions(polygons, zero_gradient)))
+
+    result = []
+    for i, (region, (key, origin)) in enumerate(zip(regions, keys)):
+        faces, median, original_edges, points = region
+        bmesh.ops.delete(bm, geom=faces, context="FACES_ONLY")
+        # -- an earlier region may have stored the same footprint
+        entry = roof_topology_cache.get(key)
+        if entry is not None:
+            roof_faces = create_cached_roof(
+                bm, entry, origin, original_edges, median, height
+            )
+            if roof_faces is not None:
+                result.append(roof_faces)
+                continue
+
+        skeleton = skeletons.get(i) or skeletonize_cached(points, [], zero_gradient)
+        roof_faces = create_skeleton_roof(bm, skeleton, original_edges, median, height)
+        # -- roofs with failed walks are not stored, the user sees the error again
+        if len(roof_faces) == len(validate(original_edges)):
+            roof_topology_cache.store(
+                key, origin, roof_faces, original_edges, median, height
+            )
+        result.append(roof_faces)
+    return result
+
+
+def create_cached_roof(bm, entry, origin, original_edges, median, height):
+    """Create the faces of a roof from a RoofTopologyCache entry
+
+    Returns None, without changing bm, if a footprint vert of the entry is missing.
+    """
+    verts, faces = entry
+    ox, oy = origin
+    grid = VertGrid({v for e in validate(original_edges) for v in e.verts})
+    footprint = {}
+    for i, (x, y, _, on_footprint) in enumerate(verts):
+        if on_footprint:
+            footprint[i] = grid.vert_at_loc(Vector((ox + x, oy + y)))
+            if footprint[i] is None:
+                return None
+
+    bm_verts = [
+        footprint.get(i) or bm.verts.new((ox + x, oy + y, median.z + fraction * height))
+        for i, (x, y, fraction, _) in enumerate(verts)
+    ]
+    result = []
+    for face in faces:
+        face_verts = [bm_verts[i] for i in face]
+        result.append(bm.faces.get(face_verts) or bm.faces.new(face_verts))
+
+    add_faces_to_group(bm, result, MaterialGroup.ROOF)
+    return result
+
+
+def create_skeleton_roof(bm, skeleton, original_edges, median, height):
+    """Create the verts, edges and faces of a roof from its straight skeleton"""
+    height_scale = height / max([arc.height for arc in skeleton])
     skeleton_edges = create_skeleton_verts_and_edges(
         bm, skeleton, original_edges, median, height_scale
     )
+    return create_skeleton_faces(bm, original_edges, skeleton_edges)
 
-    # -- create faces
-    create_skeleton_faces(bm, original_edges, skeleton_edges)
+
+def roof_outset(faces, prop, zero_gradient=False):
+    """Outset of the roof over faces, reduced to a safe value if prop.clamp_outset"""
+    points = footprint_points(faces) if prop.clamp_outset else None
+    if not points:
+        return prop.outset
+
+    outset = max_safe_outset(points, prop.outset, zero_gradient)
+    # -- even the smallest outset intersects, leave it to the user
+    return outset if outset > 0 else prop.outset
+
+
+def footprint_points(faces):
+    """Clockwise x, y points of the boundary of faces, None if it has holes"""
+    faces = set(faces)
+    boundary = {
+        loop.vert: loop
+        for f in faces
+        for loop in f.loops
+        if not any(lf in faces for lf in loop.edge.link_faces if lf is not f)
+    }
+    if not boundary:
+        return None
+
+    start = loop = next(iter(boundary.values()))
+    points = []
+    while True:
+        points.append(loop.vert.co.to_tuple()[:2])
+        loop = boundary.get(loop.link_loop_next.vert)
+        if loop is None:
+            return None
+        if loop is start:
+            break
+
+    # -- more than one boundary loop means the footprint has holes
+    return points[::-1] if len(points) == len(boundary) else None
 
 
 def sort_verts_by_loops(face):
@@ -149,67 +335,96 @@ def sort_verts_by_loops(face):
     return verts
 
 
-def vert_at_loc(loc, verts, loc_z=None):
-    """Find all verts at loc(x,y), return the one with highest z coord"""
-    results = []
-    for vert in verts:
-        co = vert.co
-        if equal(co.x, loc.x) and equal(co.y, loc.y):
-            if loc_z:
-                if equal(co.z, loc_z):
-                    results.append(vert)
-            else:
-                results.append(vert)
+class VertGrid:
+    """Hash grid of verts by their x, y location quantized to eps"""
+
+    def __init__(self, verts, eps=0.001):
+        self.eps = eps
+        self.cells = defaultdict(list)
+        for vert in verts:
+            self.add(vert)
+
+    def cell(self, x, y):
+        return math.floor(x / self.eps), math.floor(y / self.eps)
+
+    def add(self, vert):
+        self.cells[self.cell(vert.co.x, vert.co.y)].append(vert)
 
-    if results:
-        return max([v for v in results], key=lambda v: v.co.z)
-    return None
+    def vert_at_loc(self, loc):
+        """Find all verts at loc(x,y), return the one with highest z coord"""
+        cx, cy = self.cell(loc.x, loc.y)
+        results = [
+            vert
+            for i in (cx - 1, cx, cx + 1)
+            for j in (cy - 1, cy, cy + 1)
+            for vert in self.cells.get((i, j), ())
+            if equal(vert.co.x, loc.x, self.eps) and equal(vert.co.y, loc.y, self.eps)
+        ]
+        if results:
+            return max(results, key=lambda v: v.co.z)
+        return None
 
 
 def create_skeleton_verts_and_edges(bm, skeleton, original_edges, median, height_scale):
     """Create the vertices and edges from output of straight skeleton"""
     skeleton_edges = []
-    skeleton_verts = []
     O_verts = list({v for e in original_edges for v in e.verts})
+    grid = VertGrid(O_verts)
+
+    # -- height of each source (last arc wins) and sink (lowest arc) location
+    source_heights = {}
+    sink_heights = {}
+    for arc in skeleton:
+        source_heights[(arc.source.x, arc.source.y)] = arc.height
+        for sink in arc.sinks:
+            key = (sink.x, sink.y)
+            sink_heights[key] = min(sink_heights.get(key, arc.height), arc.height)
+
+    def skeleton_vert(loc, ht):
+        vert = grid.vert_at_loc(loc)
+        if not vert:
+            vert = bm.verts.new(Vector((loc.x, loc.y, median.z + ht)))
+            grid.add(vert)
+        return vert
+
+    # -- collect all ridge edges first, then create them in one pass
+    edge_verts = []
     for arc in skeleton:
         source = arc.source
-        vsource = vert_at_loc(source, O_verts + skeleton_verts)
-        if not vsource:
-            source_height = [arc.height for arc in skeleton if arc.source == source]
-            ht = source_height.pop() * height_scale
-            vsource = make_vert(bm, Vector((source.x, source.y, median.z + ht)))
-            skeleton_verts.append(vsource)
+        ht = source_heights[(source.x, source.y)] * height_scale
+        vsource = skeleton_vert(source, ht)
 
         for sink in arc.sinks:
-            vs = vert_at_loc(sink, O_verts + skeleton_verts)
-            if not vs:
-                sink_height = min([arc.height for arc in skeleton if sink in arc.sinks])
-                ht = height_scale * sink_height
-                vs = make_vert(bm, Vector((sink.x, sink.y, median.z + ht)))
-            skeleton_verts.append(vs)
-
-            # create edge
+            vs = skeleton_vert(sink, height_scale * sink_heights[(sink.x, sink.y)])
             if vs != vsource:
-                geom = bmesh.ops.contextual_create(bm, geom=[vsource, vs]).get("edges")
-                skeleton_edges.extend(geom)
+                edge_verts.append((vsource, vs))
+
+    for pair in dict.fromkeys(frozenset(p) for p in edge_verts):
+        pair = tuple(pair)
+        skeleton_edges.append(bm.edges.get(pair) or bm.edges.new(pair))
 
-    skeleton_edges = validate(skeleton_edges)
     S_verts = list({v for e in skeleton_edges for v in e.verts} - set(O_verts))
     return join_intersections_and_get_skeleton_edges(bm, S_verts, skeleton_edges)
 
 
-@map_new_faces(MaterialGroup.ROOF)
 def create_skeleton_faces(bm, original_edges, skeleton_edges):
     """Create faces formed from hiproof verts and edges"""
 
-    def interior_angle(vert, e1, e2):
-        """Determine anti-clockwise interior angle between edges
-        https://stackoverflow.com/questions/2827393/angles-between-two-n-dimensional-vectors-in-python
-        """
-        # XXX Order of vector creation is really important
-        v1 = vert.co - e1.other_vert(vert).co
-        v2 = e2.other_vert(vert).co - vert.co
-        return np.arctan2(np.linalg.det([v1.xy, v2.xy]), np.dot(v1.xy, v2.xy))
+    skeleton_edges = set(skeleton_edges)
+    fans = {}
+
+    def direction(vert, edge):
+        """Angle of edge pointing away from vert"""
+        d = edge.other_vert(vert).co - vert.co
+        return math.atan2(d.y, d.x)
+
+    def edge_fan(vert):
+        """Skeleton edges linked to vert, sorted anti-clockwise by direction"""
+        if vert not in fans:
+            edges = [e for e in vert.link_edges if e in skeleton_edges]
+            edges.sort(key=lambda e: direction(vert, e))
+            fans[vert] = ([direction(vert, e) for e in edges], edges)
+        return fans[vert]
 
     def boundary_walk(e, reverse=False):
         """Perform boundary walk using least interior angle"""
@@ -219,11 +434,15 @@ def create_skeleton_faces(bm, original_edges, skeleton_edges):
 
         previous = e
         found_edges = [e]
+        found = {e}
         while v != last:
-            linked = [
-                e for e in v.link_edges if e in skeleton_edges and e not in found_edges
-            ]
-            if not linked:
+            # -- least interior angle is the first edge anti-clockwise from previous
+            angles, edges = edge_fan(v)
+            start = bisect.bisect_right(angles, direction(v, previous))
+            linked = (edges[(start + i) % len(edges)] for i in range(len(edges)))
+            next_edge = next((e for e in linked if e not in found), None)
+
+            if next_edge is None:
                 common_edge = set(v.link_edges) & set(last.link_edges)
                 if common_edge:
                     found_edges.append(common_edge.pop())
@@ -231,16 +450,24 @@ def create_skeleton_faces(bm, original_edges, skeleton_edges):
                 # Re-walk if we have not reversed already, otherwise fail quietly
                 return boundary_walk(e, True) if not reverse else []
 
-            next_edge = linked[0]
-            if len(linked) > 1:
-                next_edge = min(linked, key=lambda e: interior_angle(v, previous, e))
             previous = next_edge
             found_edges.append(next_edge)
+            found.add(next_edge)
             v = next_edge.other_vert(v)
 
         return found_edges
 
-    result = []
+    def walk_verts(walk):
+        """Verts of a closed edge walk, in the order the walk visits them"""
+        v = walk[0].verts[1] if walk[0].verts[1] in walk[1].verts else walk[0].verts[0]
+        verts = [v]
+        for e in walk[1:]:
+            v = e.other_vert(v)
+            verts.append(v)
+        return verts
+
+    # -- collect all face loops first, then create them in one pass
+    loops = []
     for ed in validate(original_edges):
         walk = boundary_walk(ed)
         if len(walk) < 3:
@@ -253,13 +480,23 @@ def create_skeleton_faces(bm, original_edges, skeleton_edges):
                 title="Geometry Error",
             )
             continue
-        result.extend(bmesh.ops.contextual_create(bm, geom=walk).get("faces"))
-    return result
-
+        loops.append((ed, walk_verts(walk)))
 
-def make_vert(bm, location):
-    """Create a vertex at location"""
-    return bmesh.ops.create_vert(bm, co=location).get("vert").pop()
+    result = []
+    for ed, verts in loops:
+        # -- the face runs from verts[-1] to verts[0] along the eave edge, which
+        # -- must be opposite to the face below it for consistent normals
+        below = ed.link_loops[0] if ed.link_loops else None
+        if below and below.vert == verts[-1]:
+            verts.reverse()
+        face = bm.faces.get(verts) or bm.faces.new(verts)
+        face.normal_update()
+        if below is None and face.normal.z < 0:
+            face.normal_flip()
+        result.append(face)
+
+    add_faces_to_group(bm, result, MaterialGroup.ROOF)
+    return result
 
 
 def join_intersecting_verts_and_edges(bm, edges, verts):
@@ -267,9 +504,13 @@ def join_intersecting_verts_and_edges(bm, edges, verts):
     them to that edge
     """
     eps = 0.0001
-    new_verts = []
+    size, cells = bucket_edges(edges, eps)
+
+    # -- find the verts that lie on each edge, testing only edges in the same cell
+    hits = defaultdict(list)
     for v in verts:
-        for e in edges:
+        cx, cy = math.floor(v.co.x / size), math.floor(v.co.y / size)
+        for e in cells.get((cx, cy), ()):
             if v in e.verts:
                 continue
 
@@ -282,13 +523,53 @@ def join_intersecting_verts_and_edges(bm, edges, verts):
                 )
 
             if res:
-                split_vert = v1
-                split_factor = (v1.co - v.co).length / e.calc_length()
-                new_edge, new_vert = bmesh.utils.edge_split(e, split_vert, split_factor)
-                new_verts.append(new_vert)
+                hits[e].append((v1.co - v.co).length)
+
+    # -- split each edge at all its verts, walking away from its first vert
+    new_verts = []
+    for e, distances in hits.items():
+        split_vert = e.verts[0]
+        length = e.calc_length()
+        done = 0.0
+        for distance in sorted(set(distances)):
+            if distance <= done or distance >= length:
+                continue
+            split_factor = (distance - done) / (length - done)
+            # -- e keeps the part beyond the new vert
+            new_edge, split_vert = bmesh.utils.edge_split(e, split_vert, split_factor)
+            new_verts.append(split_vert)
+            done = distance
     return validate(new_verts)
 
 
+def bucket_edges(edges, pad):
+    """Bucket edges into a uniform grid over their x, y bounding boxes (padded)
+
+    Returns the cell size and a dict from cell to the edges overlapping it.
+    """
+    cells = defaultdict(list)
+    if not edges:
+        return 1.0, cells
+
+    xs = [v.co.x for e in edges for v in e.verts]
+    ys = [v.co.y for e in edges for v in e.verts]
+    extent = max(max(xs) - min(xs), max(ys) - min(ys))
+    size = max(extent / math.sqrt(len(edges)), pad * 4)
+
+    for e in edges:
+        (x1, y1), (x2, y2) = (v.co.xy for v in e.verts)
+        for i in range(
+            math.floor((min(x1, x2) - pad) / size),
+            math.floor((max(x1, x2) + pad) / size) + 1,
+        ):
+            for j in range(
+                math.floor((min(y1, y2) - pad) / size),
+                math.floor((max(y1, y2) + pad) / size) + 1,
+            ):
+                cells[(i, j)].append(e)
+    return size, cells
+
+
 def get_linked_edges(verts, filter_edges):
     """Find all the edges linked to verts that are also in filter edges"""
     linked_edges = [e for v in verts for e in v.link_edges]
@@ -433,10 +714,12 @@ def extrude_and_outset(bm, faces, thickness, outset):
 
     # -- outset the side faces from earlier extrusion
     link_faces = [f for e in top_face.edges for f in e.link_faces if f is not top_face]
-    bmesh.ops.inset_region(bm, faces=link_faces, depth=outset, use_even_offset=True)
+    inset = bmesh.ops.inset_region(
+        bm, faces=link_faces, depth=outset, use_even_offset=True
+    )
 
     # -- cleanup hidden faces
-    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+    cleanup_face_normals(bm, list(faces) + link_faces + inset["faces"] + [top_face])
     bmesh.ops.delete(bm, geom=faces, context="FACES")
 
     new_faces = list({f for e in top_face.edges for f in e.link_faces})
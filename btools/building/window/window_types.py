@@ -19,6 +19,7 @@ from ...utils import (
     arc_edge,
     local_xyz,
     valid_ngon,
+    MeshRegion,
     sort_faces,
     sort_edges,
     extrude_face,
@@ -29,8 +30,11 @@ from ...utils import (
     get_bottom_faces,
     extrude_face_region,
     calc_face_dimensions,
+    cleanup_face_normals,
     filter_vertical_edges,
+    cleanup_remove_doubles,
     filter_horizontal_edges,
+    subdivide_face_into_grid,
     subdivide_face_vertically,
     subdivide_face_horizontally,
 )
@@ -38,28 +42,31 @@ from ...utils import (
 
 def create_window(bm, faces, prop):
     """Generate a window"""
-    for face in faces:
-        face.select_set(False)
-        if not valid_ngon(face):
-            ngon_to_quad(bm, face)
-
-        clamp_array_count(face, prop)
-        array_faces = subdivide_face_horizontally(
-            bm, face, widths=[prop.width] * prop.count
-        )
-        max_width = calc_face_dimensions(array_faces[0])[0]
-
-        split_edges = get_array_split_edges(array_faces)
-        split_faces = [create_window_split(bm, aface, prop) for aface in array_faces]
-        spread_array(bm, split_edges, split_faces, max_width, prop)
-
-        for face in split_faces:
-            window, arch = create_window_frame(bm, face, prop)
-            if prop.type == "RECTANGULAR":
-                fill_face(bm, window, prop, "WINDOW")
-                if prop.add_arch:
-                    fill_arch(bm, arch, prop)
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+    with MeshRegion(bm, faces) as region:
+        for face in faces:
+            face.select_set(False)
+            if not valid_ngon(face):
+                ngon_to_quad(bm, face)
+
+            clamp_array_count(face, prop)
+            array_faces = subdivide_face_horizontally(
+                bm, face, widths=[prop.width] * prop.count
+            )
+            max_width = calc_face_dimensions(array_faces[0])[0]
+
+            split_edges = get_array_split_edges(array_faces)
+            split_faces = [
+                create_window_split(bm, aface, prop) for aface in array_faces
+            ]
+            spread_array(bm, split_edges, split_faces, max_width, prop)
+
+            for face in split_faces:
+                window, arch = create_window_frame(bm, face, prop)
+                if prop.type == "RECTANGULAR":
+                    fill_face(bm, window, prop, "WINDOW")
+                    if prop.add_arch:
+                        fill_arch(bm, arch, prop)
+    cleanup_remove_doubles(bm, region, dist=0.0001)
 
     nulfaces = find_faces_without_matgroup(bm)
     add_faces_to_group(bm, nulfaces, MaterialGroup.WALLS)
@@ -77,16 +84,14 @@ def create_window_split(bm, face, prop):
         width,
         wall_w / 2 + offset.x - width / 2,
     ]
-    h_faces = subdivide_face_horizontally(bm, face, h_widths)
     # vertical split
-    v_width = [
+    v_widths = [
         wall_h / 2 + offset.y - height / 2,
         height,
         wall_h / 2 - offset.y - height / 2,
     ]
-    v_faces = subdivide_face_vertically(bm, h_faces[1], v_width)
-
-    return v_faces[1]
+    rows = subdivide_face_into_grid(bm, face, h_widths, v_widths)
+    return rows[1][1]
 
 
 def create_window_frame(bm, face, prop):
@@ -128,7 +133,7 @@ def create_circular_frame(bm, face, prop):
     arc_edge(bm, end, res, -radius, xyz)
 
     # -- inset for frame thicknes
-    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
+    cleanup_remove_doubles(bm, faces, dist=0.0001)
     res = bmesh.ops.inset_region(
         bm, faces=[mid], use_even_offset=True, thickness=prop.frame_thickness
     )
@@ -167,7 +172,7 @@ def create_rectangular_frame(bm, face, prop):
         # -- postprocess merge loose split verts
         merge_loose_split_verts(bm, window_face, prop)
 
-    bmesh.ops.recalc_face_normals(bm, faces=list(bm.faces))
+    cleanup_face_normals(bm, {window_face, arch_face, *frame_faces} - {None})
 
     # add depths
     if prop.add_arch:
@@ -6,4 +6,11 @@ from .util_material import *
 from .util_mesh import *
 from .util_object import *
 from .util_event import *
-from .util_skeleton import skeletonize
+from .util_skeleton import (
+    skeletonize as skeletonize,
+    skeletonize_many as skeletonize_many,
+    iter_skeletonize as iter_skeletonize,
+    skeletonize_cached as skeletonize_cached,
+    skeleton_cache as skeleton_cache,
+    max_safe_outset as max_safe_outset,
+)
@@ -1,11 +1,16 @@
+import bisect
 import functools as ft
 import math
 import operator
+import contextlib
 import collections
 
 import bmesh
 import bpy
+import numpy as np
 from bmesh.types import BMVert, BMEdge, BMFace
+from mathutils import Vector
+from mathutils.kdtree import KDTree
 
 from .util_common import local_xyz, equal, minmax
 from .util_constants import VEC_UP, VEC_DOWN, VEC_FORWARD, VEC_RIGHT
@@ -185,6 +190,178 @@ def filter_parallel_edges(edges, dir):
     return [e for e in edges if is_parallel(edge_vector(e), dir)]
 
 
+class EdgeTable:
+    """Orientation of many edges, classified in one vectorized pass
+
+    The end points of edges are exported to numpy arrays once, the queries then give
+    the same answers as edge_slope, edge_is_* and filter_*_edges for those edges.
+    The table does not follow changes to the mesh, build a new one after editing.
+    """
+
+    def __init__(self, edges):
+        self.edges = list(dict.fromkeys(edges))
+        self.rows = {e: i for i, e in enumerate(self.edges)}
+
+        co = [v.co.to_tuple() for e in self.edges for v in e.verts]
+        co = np.array(co, dtype=float).reshape(-1, 2, 3)
+        self.z = np.round(co[:, :, 2], 3)
+
+        # -- normalized edge vectors, zero for zero length edges (like edge_vector)
+        d = co[:, 1] - co[:, 0]
+        length = np.linalg.norm(d, axis=1)
+        x, y, z = (d / np.where(length > 0, length, 1.0)[:, None]).T
+
+        xy = np.round(np.hypot(x, y), 4)
+        self.slope = np.full(len(self.edges), np.inf)
+        np.divide(z, xy, out=self.slope, where=xy > 0)
+
+        # -- filter_vertical_edges and filter_horizontal_edges, in 2D and 3D space
+        rx, ry, rz = (np.round(c, 3) != 0 for c in (x, y, z))
+        angle = np.round(np.arccos(np.clip(z, -1.0, 1.0)), 3)
+        self.vertical_2d = np.abs(y) > 0.5
+        self.horizontal_2d = np.abs(x) > 0.5
+        self.vertical_3d = rz & ~(rx & ry)
+        self.horizontal_3d = (length > 0) & (angle == round(math.pi / 2, 3))
+
+    def _rows(self, edges):
+        return np.array([self.rows[e] for e in edges], dtype=int)
+
+    def edge_slope(self, e):
+        return float(self.slope[self.rows[e]])
+
+    def is_vertical(self, e):
+        return self.edge_slope(e) == float("inf")
+
+    def is_horizontal(self, e):
+        return round(self.edge_slope(e), 2) == 0.0
+
+    def is_sloped(self, e):
+        sl = self.edge_slope(e)
+        return sl > float("-inf") and sl < float("inf") and sl != 0.0
+
+    def filter_vertical(self, edges):
+        """filter_vertical_edges for edges in the table, e.g the edges of a face"""
+        return self._filter(edges, self.vertical_2d, self.vertical_3d)
+
+    def filter_horizontal(self, edges):
+        """filter_horizontal_edges for edges in the table, e.g the edges of a face"""
+        return self._filter(edges, self.horizontal_2d, self.horizontal_3d)
+
+    def _filter(self, edges, in_2d, in_3d):
+        edges = list(edges)
+        rows = self._rows(edges)
+        space_2d = len(np.unique(self.z[rows])) == 1
+        mask = (in_2d if space_2d else in_3d)[rows]
+        return [e for e, keep in zip(edges, mask) if keep]
+
+
+# -- opt-in memoization of per element queries, see geometry_cache
+
+_geometry_cache = None
+
+
+class GeometryCache:
+    """Results of per element queries on one bmesh
+
+    Results are keyed on the element and the coordinates of its verts, so an element
+    that was moved or re-shaped, by bmesh.ops as well, is queried again. Every helper
+    in this module that edits the mesh calls bump_generation, which drops all results
+    at once. hits and misses count the lookups.
+    """
+
+    def __init__(self, bm):
+        self.bm = bm
+        self.generation = 0
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def query(self, func, element):
+        key = (func, element, tuple(v.co.to_tuple() for v in element.verts))
+        if key in self.results:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.results[key] = func(element)
+        return _copy_result(self.results[key])
+
+    def bump(self):
+        self.generation += 1
+        self.results.clear()
+
+    def stats(self):
+        return dict(
+            generation=self.generation,
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self.results),
+        )
+
+
+def _copy_result(value):
+    """Callers are free to change the vectors they get, so hand out copies"""
+    if isinstance(value, Vector):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    return value
+
+
+@contextlib.contextmanager
+def geometry_cache(bm):
+    """Cache geometry queries on bm for the duration of the block
+
+    Nested blocks on the same bm share one cache. Geometry edited inside the block
+    with bmesh.ops (instead of the helpers here) is noticed by its vert coordinates,
+    bump_generation after such edits only frees the stale results.
+    """
+    global _geometry_cache
+    if _geometry_cache is not None and _geometry_cache.bm == bm:
+        yield _geometry_cache
+        return
+
+    previous, _geometry_cache = _geometry_cache, GeometryCache(bm)
+    try:
+        yield _geometry_cache
+    finally:
+        _geometry_cache = previous
+
+
+def bump_generation():
+    """Drop all cached queries, the mesh has been edited"""
+    if _geometry_cache is not None:
+        _geometry_cache.bump()
+
+
+def geometry_query(func):
+    """Route func(element) through the active GeometryCache, if there is one"""
+
+    @ft.wraps(func)
+    def wrapper(element):
+        if _geometry_cache is None:
+            return func(element)
+        return _geometry_cache.query(func, element)
+
+    return wrapper
+
+
+@geometry_query
+def face_local_xyz(face):
+    """Cached local_xyz, see util_common"""
+    return local_xyz(face)
+
+
+@geometry_query
+def face_center_median(face):
+    return face.calc_center_median()
+
+
+@geometry_query
+def face_normal(face):
+    return face.normal.copy()
+
+
+@geometry_query
 def calc_edge_median(edge):
     """Calculate the center position of edge"""
     return calc_verts_median(edge.verts)
@@ -197,7 +374,7 @@ def calc_verts_median(verts):
 
 def calc_faces_median(faces):
     """Determine the median position of faces"""
-    return ft.reduce(operator.add, [f.calc_center_median() for f in faces]) / len(faces)
+    return ft.reduce(operator.add, [face_center_median(f) for f in faces]) / len(faces)
 
 
 def calc_faces_normal(faces):
@@ -210,6 +387,7 @@ def calc_faces_normal(faces):
     return (A.cross(B)).normalized()
 
 
+@geometry_query
 def calc_face_dimensions(face):
     """Determine the width and height of face"""
     horizontal_edges = filter_horizontal_edges(face.edges)
@@ -221,13 +399,14 @@ def calc_face_dimensions(face):
 
 def face_with_verts(bm, verts, default=None):
     """Find a face in the bmesh with the given verts"""
-    for face in bm.faces:
-        equal = map(
-            operator.eq,
-            sorted(verts, key=operator.attrgetter("index")),
-            sorted(face.verts, key=operator.attrgetter("index")),
-        )
-        if len(face.verts) == len(verts) and all(equal):
+    verts = list(dict.fromkeys(verts))
+    if len(verts) < 3:
+        return default
+    # -- only looks at the faces linked to the verts, not every face in bm,
+    # -- bm.faces.get would also need the verts in the order around the face
+    members = set(verts)
+    for face in verts[0].link_faces:
+        if len(face.verts) == len(members) and all(v in members for v in face.verts):
             return face
     return default
 
@@ -237,7 +416,7 @@ def subdivide_face_horizontally(bm, face, widths):
     if len(widths) < 2:
         return [face]
     edges = filter_horizontal_edges(face.edges)
-    direction, _, _ = local_xyz(face)
+    direction, _, _ = face_local_xyz(face)
     inner_edges = subdivide_edges(bm, edges, direction, widths)
     return sort_faces(list({f for e in inner_edges for f in e.link_faces}), direction)
 
@@ -247,27 +426,243 @@ def subdivide_face_vertically(bm, face, widths):
     if len(widths) < 2:
         return [face]
     edges = filter_vertical_edges(face.edges)
-    _, direction, _ = local_xyz(face)
+    _, direction, _ = face_local_xyz(face)
     inner_edges = subdivide_edges(bm, edges, direction, widths)
     return sort_faces(list({f for e in inner_edges for f in e.link_faces}), direction)
 
 
+# -- boundary verts closer than this to a grid line are reused for it
+GRID_EPS = 0.0001
+
+
+def subdivide_face_into_grid(bm, face, widths, heights):
+    """Cut a rectangular face into a grid of quads in one pass
+
+    widths are the columns from left to right (face x axis) and heights the rows from
+    bottom to top (face y axis), both are scaled to fill the face. Returns the rows of
+    faces, bottom row first. Cells without size (zero or negative widths or heights)
+    are not cut, they share the face of a neighbouring cell. Faces that are not
+    rectangles are cut along each grid line in turn instead, cells with no part of the
+    face in them share the face of the closest cell that has one.
+    """
+    if len(widths) < 2 and len(heights) < 2:
+        return [[face]]
+
+    x, y, _ = face_local_xyz(face)
+    x.normalize()
+    y.normalize()
+    us = [x.dot(v.co) for v in face.verts]
+    vs = [y.dot(v.co) for v in face.verts]
+    cols, col_of = _grid_lines(min(us), max(us), widths)
+    rows, row_of = _grid_lines(min(vs), max(vs), heights)
+    grid = _cut_face_into_grid(bm, face, x, y, us, vs, cols, rows)
+    return [[grid[r][c] for c in col_of] for r in row_of]
+
+
+def _cut_face_into_grid(bm, face, x, y, us, vs, cols, rows):
+    """Cut face along the grid lines cols (on x) and rows (on y), returns the rows"""
+    if len(cols) < 3 and len(rows) < 3:
+        return [[face]]
+
+    origin = face.verts[0].co + (cols[0] - us[0]) * x + (rows[0] - vs[0]) * y
+
+    def point(u, v):
+        return origin + (u - cols[0]) * x + (v - rows[0]) * y
+
+    def side(coords, line, key):
+        return sorted(
+            [v for v, c in zip(face.verts, coords) if abs(c - line) < GRID_EPS], key=key
+        )
+
+    def u_of(v):
+        return x.dot(v.co)
+
+    def v_of(v):
+        return y.dot(v.co)
+
+    # -- collect all four sides before any of them is split
+    bottom = side(vs, rows[0], u_of)
+    top = side(vs, rows[-1], u_of)
+    left = side(us, cols[0], v_of)
+    right = side(us, cols[-1], v_of)
+    if not _is_grid_outline(bm, face, bottom, top, left, right):
+        return _bisect_face_into_grid(bm, face, (x, cols), (y, rows))
+
+    bottom, bottom_spans = _cut_grid_side(
+        bm, bottom, u_of, cols, lambda u: point(u, rows[0])
+    )
+    top, top_spans = _cut_grid_side(bm, top, u_of, cols, lambda u: point(u, rows[-1]))
+    left, left_spans = _cut_grid_side(bm, left, v_of, rows, lambda v: point(cols[0], v))
+    right, right_spans = _cut_grid_side(
+        bm, right, v_of, rows, lambda v: point(cols[-1], v)
+    )
+
+    lattice = [bottom]
+    for r, v in enumerate(rows[1:-1], 1):
+        inner = [bm.verts.new(point(u, v)) for u in cols[1:-1]]
+        lattice.append([left[r], *inner, right[r]])
+    lattice.append(top)
+
+    # -- verts go around each cell counter clockwise in the face xy plane
+    flip = x.cross(y).dot(face.normal) < 0
+    last_row, last_col = len(rows) - 2, len(cols) - 2
+    result = []
+    for r in range(len(rows) - 1):
+        row = []
+        for c in range(len(cols) - 1):
+            verts = [lattice[r][c]]
+            verts += bottom_spans[c] if r == 0 else []
+            verts.append(lattice[r][c + 1])
+            verts += right_spans[r] if c == last_col else []
+            verts.append(lattice[r + 1][c + 1])
+            verts += top_spans[c][::-1] if r == last_row else []
+            verts.append(lattice[r + 1][c])
+            verts += left_spans[r][::-1] if c == 0 else []
+            row.append(bm.faces.new(verts[::-1] if flip else verts, face))
+        result.append(row)
+
+    bmesh.ops.delete(bm, geom=[face], context="FACES_ONLY")
+    bump_generation()
+    return result
+
+
+def _is_grid_outline(bm, face, bottom, top, left, right):
+    """Whether the sides are the whole outline of face, meeting at the four corners"""
+    sides = (bottom, top, left, right)
+    if any(len(s) < 2 for s in sides):
+        return False
+    corners = (bottom[0], bottom[-1], top[0], top[-1])
+    if corners != (left[0], right[0], left[-1], right[-1]):
+        return False
+    if len(set().union(*sides)) != len(face.verts):
+        return False
+    edges = set(face.edges)
+    return all(bm.edges.get((a, b)) in edges for s in sides for a, b in zip(s, s[1:]))
+
+
+def _bisect_face_into_grid(bm, face, *axes):
+    """Grid split of a face that is not a rectangle, by cutting it along each line
+
+    axes are (direction, lines) pairs, the outer lines are the bounds of the face.
+    """
+    faces = [face]
+    for direction, lines in axes:
+        for line in lines[1:-1]:
+            edges = list({e for f in faces for e in f.edges})
+            verts = list({v for e in edges for v in e.verts})
+            geom = bmesh.ops.bisect_plane(
+                bm,
+                geom=faces + edges + verts,
+                dist=GRID_EPS,
+                plane_co=direction * line,
+                plane_no=direction,
+            ).get("geom")
+            faces = filter_geom(geom, BMFace)
+    bump_generation()
+
+    (x, cols), (y, rows) = axes
+    grid = [[None] * (len(cols) - 1) for _ in rows[1:]]
+    for f in faces:
+        center = f.calc_center_median()
+        c = min(max(bisect.bisect(cols, x.dot(center)) - 1, 0), len(cols) - 2)
+        r = min(max(bisect.bisect(rows, y.dot(center)) - 1, 0), len(rows) - 2)
+        grid[r][c] = f
+
+    # -- cells outside the face, e.g. in the corners of a triangle
+    cells = [(r, c) for r, row in enumerate(grid) for c, f in enumerate(row) if f]
+    for r, row in enumerate(grid):
+        for c, f in enumerate(row):
+            if f is None:
+                nr, nc = min(cells, key=lambda rc: (abs(rc[1] - c), abs(rc[0] - r)))
+                row[c] = grid[nr][nc]
+    return grid
+
+
+def _grid_lines(start, end, sizes):
+    """Positions of the lines around sizes laid end to end, scaled to span start-end
+
+    Sizes that are too small to cut get no lines. Returns the lines and, for each
+    size, the index of the cell between the lines that it ended up in.
+    """
+    sizes = [max(size, 0.0) for size in sizes]
+    scale = (end - start) / (sum(sizes) or 1.0)
+    lines, cells = [start], []
+    for size in sizes:
+        cells.append(len(lines) - 1)
+        if size * scale >= GRID_EPS:
+            lines.append(lines[-1] + size * scale)
+    if len(lines) == 1:
+        lines.append(end)
+    lines[-1] = end
+    # -- cells without size share the next cell, the last ones the previous
+    last = len(lines) - 2
+    return lines, [min(cell, last) for cell in cells]
+
+
+def _cut_grid_side(bm, side, key, targets, to_point):
+    """Split the boundary side (verts sorted by key) so it has a vert at each target
+
+    Returns the verts at the targets and, for each span between two of them, the verts
+    that were already on the side, like the cuts of a neighbouring face.
+    """
+    found = [side[0]]
+    free = set(side[1:-1])
+    for t in targets[1:-1]:
+        vert = next((v for v in free if abs(key(v) - t) < GRID_EPS), None)
+        if vert is not None:
+            free.remove(vert)
+        else:
+            i = max((i for i, v in enumerate(side[:-1]) if key(v) <= t), default=0)
+            a, b = side[i], side[i + 1]
+            _, vert = bmesh.utils.edge_split(bm.edges.get((a, b)), a, 0.5)
+            vert.co = to_point(t)
+            side.insert(i + 1, vert)
+        found.append(vert)
+    found.append(side[-1])
+
+    spans = [[]]
+    for v in side[1:-1]:
+        if v in found:
+            spans.append([])
+        else:
+            spans[-1].append(v)
+    return found, spans
+
+
 def subdivide_edges(bm, edges, direction, widths):
     """Subdivide edges in a direction, widths in the direction"""
     dir = direction.copy().normalized()
     cuts = len(widths) - 1
     res = bmesh.ops.subdivide_edges(bm, edges=edges, cuts=cuts)
+    bump_generation()
     inner_edges = filter_geom(res.get("geom_inner"), BMEdge)
     distance = sum(widths) / len(widths)
     final_position = 0.0
+    offsets = []
     for i, edge in enumerate(sort_edges(inner_edges, dir)):
         original_position = (i + 1) * distance
         final_position += widths[i]
         diff = final_position - original_position
-        bmesh.ops.translate(bm, verts=edge.verts, vec=diff * dir)
+        offsets.append((edge.verts, diff * dir))
+    translate_verts(offsets)
     return inner_edges
 
 
+def translate_verts(offsets):
+    """Move groups of verts in one pass, instead of a bmesh.ops.translate per group
+
+    offsets is an iterable of (verts, vec) pairs, a vert that is in more than one
+    group is moved by the sum of their vecs.
+    """
+    moves = collections.defaultdict(Vector)
+    for verts, vec in offsets:
+        for v in set(verts):
+            moves[v] += vec
+    for v, vec in moves.items():
+        v.co += vec
+    bump_generation()
+
+
 def arc_edge(bm, edge, resolution, height, xyz, function="SPHERE"):
     """Subdivide the given edge and offset vertices to form an arc"""
     length = edge.calc_length()
@@ -301,6 +696,7 @@ def arc_edge(bm, edge, resolution, height, xyz, function="SPHERE"):
             v.co += arc_direction * math.sin(angle) * height
 
     {"SINE": arc_sine, "SPHERE": arc_sphere}.get(function)(verts)
+    bump_generation()
     return ret
 
 
@@ -318,6 +714,7 @@ def extrude_face(bm, face, extrude_depth):
             if f not in [extruded_face]
         }
     )
+    bump_generation()
     return extruded_face, surrounding_faces
 
 
@@ -342,16 +739,30 @@ def extrude_face_region(bm, faces, depth, normal):
             if f not in extruded_faces
         }
     )
+    bump_generation()
     return extruded_faces, surrounding_faces
 
 
-def closest_faces(faces, locations):
-    def get_face(faces, location):
-        for f in faces:
-            if equal((f.calc_center_bounds() - location).length, 0):
-                return f
+def closest_faces(faces, locations, tol=0.001):
+    """Find the face whose bounds center is at each of locations (within tol)
 
-    return [get_face(faces, l) for l in locations]
+    Locations without a face get None, locations with more than one face are an error.
+    """
+    faces = list(faces)
+    tree = KDTree(len(faces))
+    for i, f in enumerate(faces):
+        tree.insert(f.calc_center_bounds(), i)
+    tree.balance()
+
+    result = []
+    for location in locations:
+        found = tree.find_range(location, tol)
+        if len(found) > 1:
+            raise ValueError(
+                "{} faces are centered at {}, expected one".format(len(found), location)
+            )
+        result.append(faces[found[0][1]] if found else None)
+    return result
 
 
 def get_selected_face_dimensions(context):
@@ -380,7 +791,9 @@ def create_face(bm, size, offset, xyz):
         bm, co=offset - size.x * xyz[0] / 2 - size.y * xyz[1] / 2
     )["vert"][0]
 
-    return bmesh.ops.contextual_create(bm, geom=[v1, v2, v3, v4])["faces"][0]
+    face = bmesh.ops.contextual_create(bm, geom=[v1, v2, v3, v4])["faces"][0]
+    bump_generation()
+    return face
 
 
 def get_top_edges(edges, n=1):
@@ -422,7 +835,7 @@ def get_bounding_verts(verts):
 
 
 def sort_faces(faces, direction):
-    return sorted(faces, key=lambda f: direction.dot(f.calc_center_median()))
+    return sorted(faces, key=lambda f: direction.dot(face_center_median(f)))
 
 
 def sort_edges(edges, direction):
@@ -454,27 +867,100 @@ def ngon_to_quad(bm, face):
     )
     bmesh.ops.dissolve_edges(bm, edges=diss_edges)
     bmesh.ops.dissolve_verts(bm, verts=diss_verts)
+    bump_generation()
 
 
 def get_selection_groups(bm):
     """Group faces that are selected and adjacent to each other"""
-    selected_faces = [f for f in bm.faces if f.select]
+    visited = set()
+    result = []
+    for start in bm.faces:
+        if not start.select or start in visited:
+            continue
+
+        # -- breadth first search over shared edges, group doubles as the queue
+        visited.add(start)
+        group = [start]
+        for face in group:
+            for e in face.edges:
+                for f in e.link_faces:
+                    if f.select and f not in visited:
+                        visited.add(f)
+                        group.append(f)
+        result.append(group)
+    return result
 
-    def get_adjacent_selected(faces):
-        return list(
-            {fa for f in faces for e in f.edges for fa in e.link_faces if fa.select}
-        )
 
-    result = []
-    while selected_faces:
-        current = selected_faces[0]
+# -- set to True (on this module) to run cleanup passes on the whole mesh again
+FULL_MESH_CLEANUP = False
 
-        faces = [current]
-        adjacent = get_adjacent_selected(faces)
-        while len(adjacent) > len(faces):
-            faces = adjacent[:]
-            adjacent = get_adjacent_selected(faces)
 
-        list(map(selected_faces.remove, adjacent))
-        result.append(adjacent)
-    return result
+class MeshRegion:
+    """Faces touched by a build step, so cleanup passes can skip the rest of the mesh
+
+    faces are the faces the step starts from, faces created inside a `with` block
+    are added to the region. Other faces can be added with add().
+    """
+
+    def __init__(self, bm, faces=()):
+        self.bm = bm
+        self.faces = set(faces)
+        self._before = None
+
+    def __enter__(self):
+        # -- faces, not verts: bmesh.ops.subdivide_edges invalidates every BMVert
+        self._before = set(self.bm.faces)
+        return self
+
+    def __exit__(self, *args):
+        self.faces = {f for f in self.faces if f.is_valid}
+        self.faces |= set(self.bm.faces) - self._before
+        self._before = None
+
+    def add(self, faces):
+        """Add faces that were not created inside the `with` block"""
+        self.faces.update(faces)
+
+    def __iter__(self):
+        return iter({f for f in self.faces if f.is_valid})
+
+
+def face_ring(faces):
+    """faces together with all the faces that share a vertex with them"""
+    return {f for face in faces for v in face.verts for f in v.link_faces}
+
+
+def cleanup_remove_doubles(bm, region, dist):
+    """Merge doubles among the verts of region and its one-ring of faces"""
+    if FULL_MESH_CLEANUP:
+        verts = bm.verts
+    else:
+        verts = list({v for f in face_ring(region) for v in f.verts})
+    bmesh.ops.remove_doubles(bm, verts=verts, dist=dist)
+    bump_generation()
+
+
+def cleanup_face_normals(bm, region):
+    """Recalculate the normals of region and its one-ring of faces
+
+    The ring lies outside the region and keeps its orientation. The region is
+    flipped when most of the ring disagrees with it, ring faces that the
+    recalculation flipped are flipped back.
+    """
+    if FULL_MESH_CLEANUP:
+        bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+        bump_generation()
+        return
+
+    faces = {f for f in region if f.is_valid}
+    ring = face_ring(faces) - faces
+    normals = {f: f.normal.copy() for f in ring}
+    bmesh.ops.recalc_face_normals(bm, faces=list(faces | ring))
+
+    flipped = [f for f in ring if f.normal.dot(normals[f]) < 0]
+    if len(flipped) * 2 > len(ring):
+        for f in faces:
+            f.normal_flip()
+    for f in flipped:
+        f.normal_flip()
+    bump_generation()
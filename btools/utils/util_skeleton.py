@@ -1,11 +1,32 @@
 """ Adapted from https://github.com/yonghah/polyskel
 """
 
+import os
 import math
+import pickle
 import heapq
 import operator as op
 import itertools as it
-from collections import namedtuple
+from collections import namedtuple, defaultdict, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# -- tolerance of robust skeletonize, relative to the size of the polygon
+ROBUST_EPS = 1e-6
+
+
+class BrokenLavError(ValueError):
+    """Raised when a walk around a lav never gets back to its head"""
+
+
+# -- default upper bound on the processes of iter_skeletonize
+MAX_SKELETON_WORKERS = 4
+
+# -- split event candidates of one vertex above which they are tested with NumPy,
+# -- e.g. on star footprints where the grid cells hardly prune any edges
+SPLIT_BATCH_SIZE = 64
 
 
 class Vector2:
@@ -186,6 +207,8 @@ class Vector2:
 
 
 class Geometry:
+    __slots__ = ()
+
     def _connect_unimplemented(self, other):
         raise AttributeError(
             "Cannot connect %s to %s" % (self.__class__, other.__class__)
@@ -267,6 +290,8 @@ def _connect_line2_line2(A, B):
 
 
 class Point2(Vector2, Geometry):
+    __slots__ = ()
+
     def __repr__(self):
         return "Point2(%.2f, %.2f)" % (self.x, self.y)
 
@@ -369,6 +394,8 @@ class Line2(Geometry):
 
 
 class Ray2(Line2):
+    __slots__ = ()
+
     def __repr__(self):
         return "Ray2(<%.2f, %.2f> + u<%.2f, %.2f>)" % (
             self.p.x,
@@ -382,6 +409,8 @@ class Ray2(Line2):
 
 
 class LineSegment2(Line2):
+    __slots__ = ()
+
     def __repr__(self):
         return "LineSegment2(<%.2f, %.2f> to <%.2f, %.2f>)" % (
             self.p.x,
@@ -408,6 +437,57 @@ class LineSegment2(Line2):
     length = property(lambda self: abs(self.v))
 
 
+# -- Lean float helpers used by the event loop. Lines are (px, py, vx, vy) tuples and
+# -- vectors are (x, y) pairs. They perform the same operations as the classes above,
+# -- without the allocations and type dispatch.
+def _unit(x, y):
+    """Same as Vector2(x, y).normalized()"""
+    d = math.sqrt(x * x + y * y)
+    if d:
+        return x / d, y / d
+    return x, y
+
+
+def _line_tuple(line):
+    """Origin and direction of line as a float tuple"""
+    return line.p.x, line.p.y, line.v.x, line.v.y
+
+
+def _intersect(a, b, a_ray=False, b_ray=False):
+    """Same as _intersect_line2_line2, returns an (x, y) pair or None"""
+    apx, apy, avx, avy = a
+    bpx, bpy, bvx, bvy = b
+    d = bvy * avx - bvx * avy
+    if d == 0:
+        return None
+
+    dy = apy - bpy
+    dx = apx - bpx
+    ua = (bvx * dy - bvy * dx) / d
+    if a_ray and not ua >= 0.0:
+        return None
+    if b_ray and not (avx * dy - avy * dx) / d >= 0.0:
+        return None
+    return apx + ua * avx, apy + ua * avy
+
+
+def _line_distance(line, x, y):
+    """Same as Line2(line).distance(Point2(x, y))"""
+    px, py, vx, vy = line
+    u = ((x - px) * vx + (y - py) * vy) / (vx * vx + vy * vy)
+    dx = px + u * vx - x
+    dy = py + u * vy - y
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def _signed_area(points):
+    """Shoelace area of (x, y) points, negative for the orientation of skeletonize"""
+    points = list(points)
+    return 0.5 * sum(
+        x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])
+    )
+
+
 def window(lst):
     prevs, items, nexts = it.tee(lst, 3)
     prevs = it.islice(it.cycle(prevs), len(lst) - 1, None)
@@ -430,8 +510,10 @@ def approximately_same(point_a, point_b):
     )
 
 
-def normalize_contour(contour):
+def normalize_contour(contour, tol=0.0):
     contour = [Point2(float(x), float(y)) for (x, y) in contour]
+    if tol:
+        contour = merge_contour(contour, tol)
     return [
         point
         for prev, point, next in window(contour)
@@ -441,6 +523,36 @@ def normalize_contour(contour):
     ]
 
 
+def merge_contour(contour, tol):
+    """Drop points closer than tol to their successor or to the line through their neighbours"""
+    changed = True
+    while changed and len(contour) > 3:
+        changed = False
+        result = []
+        for prev, point, next in window(contour):
+            if result:
+                prev = result[-1]
+            if abs(point - next) <= tol:
+                changed = True
+                continue
+
+            # -- distance of point to the line prev -> next
+            direction = next - prev
+            length = abs(direction)
+            if length and abs(cross(direction, point - prev)) / length <= tol:
+                changed = True
+                continue
+            result.append(point)
+        contour = result
+
+    # -- e.g. slivers thinner than tol, there is nothing left to skeletonize
+    if len(contour) < 3 or any(abs(p - n) <= tol for _, p, n in window(contour)):
+        raise ValueError(
+            "Contour collapses to fewer than 3 points at tolerance {}".format(tol)
+        )
+    return contour
+
+
 # -- Event Type (etype) is 1
 class SplitEvent(
     namedtuple("SplitEvent", "distance intersection_point etype vertex opposite_edge")
@@ -469,8 +581,215 @@ OriginalEdge = namedtuple("_OriginalEdge", "edge bisector_left, bisector_right")
 
 Subtree = namedtuple("Subtree", "source, height, sinks")
 
+# -- polygon is a list of (point, height) bounding the roof face of an original edge
+EdgeFace = namedtuple("EdgeFace", "edge, polygon")
+
+
+class EdgeGrid:
+    """Uniform grid over the original edges, used to find split event candidates
+
+    A split event of a reflex vertex on an original edge can only happen inside the
+    region bounded by that edge and its two bisectors. Each edge is stored in the
+    cells overlapped by this region, so that a reflex bisector only has to test the
+    edges stored in the cells it passes through. Parts of a region outside the grid
+    bounds are only reachable from bisectors that start outside it, those test every
+    edge directly.
+
+    On star like footprints the regions overlap (almost) every cell and the grid
+    prunes little, queries with more than SPLIT_BATCH_SIZE candidates are tested
+    with NumPy, the split events of such a vertex too (see LAVertex.next_event).
+    """
+
+    def __init__(self, original_edges):
+        self.edges = original_edges
+
+        xs = [e.edge.p.x for e in original_edges]
+        ys = [e.edge.p.y for e in original_edges]
+        size = max(max(xs) - min(xs), max(ys) - min(ys), 1e-6)
+
+        # -- pad the bounds so that events on the outline are well inside the grid
+        self.tol = size * 1e-7
+        self.min_x, self.min_y = min(xs) - size * 0.01, min(ys) - size * 0.01
+        self.max_x, self.max_y = max(xs) + size * 0.01, max(ys) + size * 0.01
+
+        # -- roughly one cell per edge, following the aspect of the bounds
+        width, height = self.max_x - self.min_x, self.max_y - self.min_y
+        count = math.sqrt(len(original_edges))
+        self.cols = max(1, int(round(count * math.sqrt(width / height))))
+        self.rows = max(1, int(round(count * math.sqrt(height / width))))
+        self.cell_w = width / self.cols
+        self.cell_h = height / self.rows
+
+        self.planes = [self._edge_planes(edge) for edge in original_edges]
+        # -- ox, oy, nx and ny of the planes as arrays of shape (edges, 3)
+        array = np.array(self.planes, dtype=float).reshape(-1, 3, 4)
+        self.plane_arrays = tuple(np.ascontiguousarray(array[..., i]) for i in range(4))
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        for idx, planes in enumerate(self.planes):
+            for cell in self._cells_in_region(self._clip_region(planes)):
+                self.cells[cell].append(idx)
+
+    def query(self, point, direction):
+        """Return the indices (in original order) of the edges whose regions are reached
+        by the ray from point in direction
+        """
+        d = math.hypot(direction.x, direction.y)
+        dx, dy = direction.x / d, direction.y / d
+        px, py = point.x, point.y
+
+        if self.min_x <= px <= self.max_x and self.min_y <= py <= self.max_y:
+            found = sorted(self._walk(px, py, dx, dy))
+        else:
+            found = range(len(self.edges))
+
+        if len(found) > SPLIT_BATCH_SIZE:
+            found = np.asarray(found, dtype=int)
+            return found[self._rays_reach(found, px, py, dx, dy)].tolist()
+        return [
+            idx for idx in found if self._ray_reaches(self.planes[idx], px, py, dx, dy)
+        ]
+
+    def _walk(self, px, py, dx, dy):
+        """Collect the edges in all cells along the ray (Amanatides & Woo)"""
+        col = min(int((px - self.min_x) / self.cell_w), self.cols - 1)
+        row = min(int((py - self.min_y) / self.cell_h), self.rows - 1)
+        step_c = 1 if dx > 0 else -1
+        step_r = 1 if dy > 0 else -1
+        if dx:
+            bound = self.min_x + (col + (dx > 0)) * self.cell_w
+            t_col, dt_col = (bound - px) / dx, self.cell_w / abs(dx)
+        else:
+            t_col = dt_col = math.inf
+        if dy:
+            bound = self.min_y + (row + (dy > 0)) * self.cell_h
+            t_row, dt_row = (bound - py) / dy, self.cell_h / abs(dy)
+        else:
+            t_row = dt_row = math.inf
+
+        found = set()
+        while 0 <= col < self.cols and 0 <= row < self.rows:
+            found.update(self.cells[row * self.cols + col])
+            if len(found) == len(self.edges):
+                break
+            if t_col < t_row:
+                col += step_c
+                t_col += dt_col
+            else:
+                row += step_r
+                t_row += dt_row
+        return found
+
+    def _ray_reaches(self, planes, px, py, dx, dy):
+        """Check whether the ray enters the region bounded by planes (with tolerance)"""
+        t_min, t_max = 0.0, math.inf
+        for ox, oy, nx, ny in planes:
+            # -- signed distance along the ray is a + b*t, keep where it is >= -tol
+            a = nx * (px - ox) + ny * (py - oy) + self.tol
+            b = nx * dx + ny * dy
+            if b > 0:
+                t_min = max(t_min, -a / b)
+            elif b < 0:
+                t_max = min(t_max, -a / b)
+            elif a < 0:
+                return False
+        return t_min <= t_max
+
+    def _rays_reach(self, indices, px, py, dx, dy):
+        """Vectorized _ray_reaches for the regions of the edges at indices"""
+        if len(indices) == len(self.edges):
+            ox, oy, nx, ny = self.plane_arrays
+        else:
+            ox, oy, nx, ny = (a[indices] for a in self.plane_arrays)
+        a = nx * (px - ox) + ny * (py - oy) + self.tol
+        b = nx * dx + ny * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = -a / b
+        t_min = np.where(b > 0, t, 0.0).max(axis=1)
+        t_max = np.where(b < 0, t, math.inf).min(axis=1)
+        blocked = ((b == 0) & (a < 0)).any(axis=1)
+        return ~blocked & (t_min <= t_max)
+
+    def _edge_planes(self, edge):
+        """Half planes (point, inward unit normal) in front of edge and between its bisectors"""
+        planes = []
+        for line, sign in (
+            (edge.bisector_left, 1),
+            (edge.bisector_right, -1),
+            (edge.edge, -1),
+        ):
+            length = abs(line.v)
+            nx, ny = -sign * line.v.y / length, sign * line.v.x / length
+            planes.append((line.p.x, line.p.y, nx, ny))
+        return planes
+
+    def _clip_region(self, planes):
+        """Clip the grid bounds to the region bounded by planes"""
+        region = [
+            (self.min_x, self.min_y),
+            (self.max_x, self.min_y),
+            (self.max_x, self.max_y),
+            (self.min_x, self.max_y),
+        ]
+        for ox, oy, nx, ny in planes:
+            region = _clip_polygon(
+                region, lambda x, y: nx * (x - ox) + ny * (y - oy) + self.tol
+            )
+        return region
+
+    def _cells_in_region(self, region):
+        """Find the indices of all cells overlapped by a convex region"""
+        if not region:
+            return []
+
+        tol = self.tol
+        ys = [y for _, y in region]
+        row_start = max(0, int((min(ys) - tol - self.min_y) / self.cell_h))
+        row_end = min(self.rows - 1, int((max(ys) + tol - self.min_y) / self.cell_h))
+
+        cells = []
+        for row in range(row_start, row_end + 1):
+            y0 = self.min_y + row * self.cell_h - tol
+            y1 = y0 + self.cell_h + 2 * tol
+            band = _clip_polygon(region, lambda x, y: y - y0)
+            band = _clip_polygon(band, lambda x, y: y1 - y)
+            if not band:
+                continue
+
+            xs = [x for x, _ in band]
+            col_start = max(0, int((min(xs) - tol - self.min_x) / self.cell_w))
+            col_end = min(
+                self.cols - 1, int((max(xs) + tol - self.min_x) / self.cell_w)
+            )
+            cells.extend(row * self.cols + c for c in range(col_start, col_end + 1))
+        return cells
+
+
+def _clip_polygon(polygon, side):
+    """Clip a convex polygon, keeping the part where side(x, y) >= 0 (Sutherland-Hodgman)"""
+    result = []
+    for (ax, ay), (bx, by) in zip(polygon, polygon[1:] + polygon[:1]):
+        sa, sb = side(ax, ay), side(bx, by)
+        if sa >= 0:
+            result.append((ax, ay))
+        if (sa >= 0) != (sb >= 0):
+            t = sa / (sa - sb)
+            result.append((ax + t * (bx - ax), ay + t * (by - ay)))
+    return result
+
 
 class LAVertex:
+    __slots__ = [
+        "_bisector",
+        "_is_reflex",
+        "_valid",
+        "edge_left",
+        "edge_right",
+        "lav",
+        "next",
+        "point",
+        "prev",
+    ]
+
     def __init__(self, point, edge_left, edge_right, direction_vectors=None):
         self.point = point
         self.edge_left = edge_left
@@ -502,88 +821,139 @@ class LAVertex:
     def original_edges(self):
         return self.lav._slav._original_edges
 
+    @property
+    def edge_grid(self):
+        return self.lav._slav._edge_grid
+
     def next_event(self):
         events = []
         if self.is_reflex:
-            for edge in self.original_edges:
-                if edge.edge == self.edge_left or edge.edge == self.edge_right:
-                    continue
+            # -- only test the original edges that the bisector can reach
+            indices = self.edge_grid.query(self.point, self.bisector.v)
+            if len(indices) > SPLIT_BATCH_SIZE:
+                events.extend(self._batch_split_events(indices))
+            else:
+                events.extend(self._split_events(indices))
 
-                leftdot = abs(
-                    self.edge_left.v.normalized().dot(edge.edge.v.normalized())
-                )
-                rightdot = abs(
-                    self.edge_right.v.normalized().dot(edge.edge.v.normalized())
-                )
-                selfedge = self.edge_left if leftdot < rightdot else self.edge_right
-
-                i = Line2(selfedge).intersect(Line2(edge.edge))
-                if i is not None and not approximately_equals(i, self.point):
-                    # locate candidate b
-                    linvec = (self.point - i).normalized()
-                    edvec = edge.edge.v.normalized()
-                    if linvec.dot(edvec) < 0:
-                        edvec = -edvec
-
-                    bisecvec = edvec + linvec
-                    if abs(bisecvec) == 0:
-                        continue
-                    bisector = Line2(i, bisecvec)
-                    b = bisector.intersect(self.bisector)
-
-                    if b is None:
-                        continue
-
-                    xleft = (
-                        cross(
-                            edge.bisector_left.v.normalized(),
-                            (b - edge.bisector_left.p).normalized(),
-                        )
-                        > 0
-                    )
-                    xright = (
-                        cross(
-                            edge.bisector_right.v.normalized(),
-                            (b - edge.bisector_right.p).normalized(),
-                        )
-                        < 0
-                    )
-                    xedge = (
-                        cross(edge.edge.v.normalized(), (b - edge.edge.p).normalized())
-                        < 0
-                    )
-
-                    if not (xleft and xright and xedge):
-                        continue
-
-                    events.append(
-                        SplitEvent(Line2(edge.edge).distance(b), b, 0, self, edge.edge)
-                    )
-
-        i_prev = self.bisector.intersect(self.prev.bisector)
-        i_next = self.bisector.intersect(self.next.bisector)
+        px, py = self.point.x, self.point.y
+        bisector = _line_tuple(self.bisector)
+        i_prev = _intersect(_line_tuple(self.prev.bisector), bisector, True, True)
+        i_next = _intersect(_line_tuple(self.next.bisector), bisector, True, True)
 
         if i_prev is not None:
-            events.append(
-                EdgeEvent(
-                    Line2(self.edge_left).distance(i_prev), i_prev, 1, self.prev, self
-                )
-            )
+            distance = _line_distance(_line_tuple(self.edge_left), *i_prev)
+            events.append(EdgeEvent(distance, Point2(*i_prev), 1, self.prev, self))
         if i_next is not None:
-            events.append(
-                EdgeEvent(
-                    Line2(self.edge_right).distance(i_next), i_next, 1, self, self.next
-                )
-            )
+            distance = _line_distance(_line_tuple(self.edge_right), *i_next)
+            events.append(EdgeEvent(distance, Point2(*i_next), 1, self, self.next))
 
         if not events:
             return None
 
-        ev = min(
-            events, key=lambda event: self.point.distance(event.intersection_point)
+        def distance_from_self(event):
+            dx = event.intersection_point.x - px
+            dy = event.intersection_point.y - py
+            return math.sqrt(dx * dx + dy * dy)
+
+        return min(events, key=distance_from_self)
+
+    def _split_events(self, indices):
+        """Find split events between this (reflex) vertex and the original edges at indices"""
+        slav = self.lav._slav
+        px, py = self.point.x, self.point.y
+        left, right = _line_tuple(self.edge_left), _line_tuple(self.edge_right)
+        lx, ly = _unit(left[2], left[3])
+        rx, ry = _unit(right[2], right[3])
+        bisector = _line_tuple(self.bisector)
+        magnitude = math.sqrt(px * px + py * py)
+
+        events = []
+        for idx in indices:
+            edge = slav._original_edges[idx]
+            if edge.edge is self.edge_left or edge.edge is self.edge_right:
+                continue
+            line, (ex, ey), left_bisector, right_bisector = slav._edge_data[idx]
+
+            # -- intersect with the vertex edge that is least parallel to this edge
+            if abs(lx * ex + ly * ey) < abs(rx * ex + ry * ey):
+                i = _intersect(line, left)
+            else:
+                i = _intersect(line, right)
+            if i is None:
+                continue
+
+            # -- skip intersections (approximately) at this vertex
+            ix, iy = i
+            dx, dy = ix - px, iy - py
+            tolerance = max(math.sqrt(ix * ix + iy * iy), magnitude) * 0.001
+            if (ix == px and iy == py) or math.sqrt(dx * dx + dy * dy) <= tolerance:
+                continue
+
+            # -- locate candidate b
+            linx, liny = _unit(px - ix, py - iy)
+            edx, edy = ex, ey
+            if linx * ex + liny * ey < 0:
+                edx, edy = -ex, -ey
+
+            bx, by = edx + linx, edy + liny
+            if math.sqrt(bx * bx + by * by) == 0:
+                continue
+            b = _intersect(bisector, (ix, iy, bx, by), a_ray=True)
+            if b is None:
+                continue
+
+            # -- b has to be in front of the edge and between its bisectors
+            x, y = b
+            lpx, lpy, lnx, lny = left_bisector
+            ux, uy = _unit(x - lpx, y - lpy)
+            if not lnx * uy - ux * lny > 0:
+                continue
+            rpx, rpy, rnx, rny = right_bisector
+            ux, uy = _unit(x - rpx, y - rpy)
+            if not rnx * uy - ux * rny < 0:
+                continue
+            ux, uy = _unit(x - line[0], y - line[1])
+            if not ex * uy - ux * ey < 0:
+                continue
+
+            distance = _line_distance(line, x, y)
+            events.append(SplitEvent(distance, Point2(x, y), 0, self, edge.edge))
+        return events
+
+    def _batch_split_events(self, indices):
+        """Closest split event of _split_events, tested with NumPy"""
+        slav = self.lav._slav
+        original = slav._original_edges
+        indices = np.array(
+            [
+                idx
+                for idx in indices
+                if original[idx].edge is not self.edge_left
+                and original[idx].edge is not self.edge_right
+            ],
+            dtype=int,
+        )
+        if not len(indices):
+            return []
+
+        x, y, key, dist = _np_split_events(
+            self.point.x,
+            self.point.y,
+            _line_tuple(self.bisector),
+            _line_tuple(self.edge_left),
+            _line_tuple(self.edge_right),
+            _np_rows(slav._edge_lines, indices),
+            _np_rows(slav._left_bisectors, indices),
+            _np_rows(slav._right_bisectors, indices),
         )
 
-        return ev
+        # -- first closest, like min over the events of _split_events
+        best = np.argmin(key)
+        if not np.isfinite(key[best]):
+            return []
+        point = Point2(float(x[best]), float(y[best]))
+        edge = original[indices[best]].edge
+        return [SplitEvent(float(dist[best]), point, 0, self, edge)]
 
     def invalidate(self):
         if self.lav is not None:
@@ -613,11 +983,68 @@ class LAVertex:
         )
 
 
-class SLAV:
-    def __init__(self, polygon, holes):
-        contours = [normalize_contour(polygon)]
-        contours.extend([normalize_contour(hole) for hole in holes])
+def _edge_key(edge):
+    """Hashable key of an edge, edges with the same origin and direction share a key"""
+    return (edge.p.x, edge.p.y) + _unit(edge.v.x, edge.v.y)
+
+
+def _edge_position(key, x, y):
+    """Position of (x, y) along the edge of key and its signed distance from it"""
+    px, py, ux, uy = key
+    dx, dy = x - px, y - py
+    return dx * ux + dy * uy, ux * dy - uy * dx
+
+
+def _outward(index, count):
+    """Indices 0 <= i < count, starting at index and moving away from it both ways"""
+    if not count:
+        return
+    index = min(max(index, 0), count - 1)
+    yield index
+    for step in range(1, count):
+        if index + step < count:
+            yield index + step
+        if index - step >= 0:
+            yield index - step
+        if index + step >= count and index - step < 0:
+            return
 
+
+def _is_between_bisectors(point, x, y, eps=0.0):
+    """Check whether point lies between the bisectors of y (left) and x (right)"""
+    xleft = cross(y.bisector.v.normalized(), (point - y.point).normalized()) >= -eps
+    xright = cross(x.bisector.v.normalized(), (point - x.point).normalized()) <= eps
+    return xleft and xright
+
+
+class SLAV:
+    def __init__(self, polygon, holes, tol=0.0, track_arcs=False, strict=True):
+        contours = [normalize_contour(polygon, tol)]
+        contours.extend([normalize_contour(hole, tol) for hole in holes or []])
+
+        # -- strict keeps a split event from pairing a vertex with its own edges
+        self._strict = strict
+        # -- every vertex ever added, no walk around a lav can be longer
+        self._created = 0
+
+        # -- path (start, end, edge_left, edge_right) of every finished vertex
+        self._arcs = [] if track_arcs else None
+
+        # -- EventQueue told about every invalidated vertex, set by skeletonize
+        self.queue = None
+
+        # -- robust mode, points closer than tol are merged/snapped
+        self._tol = tol
+        self._eps = ROBUST_EPS if tol else 0.0
+        self._snap_cells = defaultdict(list)
+        for point in it.chain.from_iterable(contours):
+            self.snap(point)
+
+        # -- live vertices by the key of their edge_right, in order along the edge,
+        # -- each the start of one piece of an (often split) original edge
+        self._edge_pieces = defaultdict(list)
+        self._piece_motion = {}
+        self._edge_keys = {}
         self._lavs = [LAV.from_polygon(contour, self) for contour in contours]
 
         # store original polygon edges for calculating split events
@@ -629,6 +1056,25 @@ class SLAV:
             )
             for vertex in it.chain.from_iterable(self._lavs)
         ]
+        self._edge_data = [
+            (
+                _line_tuple(e.edge),
+                _unit(e.edge.v.x, e.edge.v.y),
+                (e.bisector_left.p.x, e.bisector_left.p.y)
+                + _unit(e.bisector_left.v.x, e.bisector_left.v.y),
+                (e.bisector_right.p.x, e.bisector_right.p.y)
+                + _unit(e.bisector_right.v.x, e.bisector_right.v.y),
+            )
+            for e in self._original_edges
+        ]
+        self._edge_lines = _np_lines([e.edge for e in self._original_edges])
+        self._left_bisectors = _np_lines(
+            [e.bisector_left for e in self._original_edges]
+        )
+        self._right_bisectors = _np_lines(
+            [e.bisector_right for e in self._original_edges]
+        )
+        self._edge_grid = EdgeGrid(self._original_edges)
 
     def __iter__(self):
         for lav in self._lavs:
@@ -640,6 +1086,172 @@ class SLAV:
     def empty(self):
         return len(self._lavs) == 0
 
+    def edge_key(self, edge):
+        """Cached _edge_key, edges are shared between the vertices of a LAV"""
+        key = self._edge_keys.get(edge)
+        if key is None:
+            key = self._edge_keys[edge] = _edge_key(edge)
+        return key
+
+    def add_vertex(self, vertex):
+        """Index a live vertex as the start of a piece of its edge_right"""
+        self._created += 1
+        key = self.edge_key(vertex.edge_right)
+        s, d = _edge_position(key, vertex.point.x, vertex.point.y)
+        # -- the vertex moves along its bisector, at position a + c * d on the edge
+        # -- when its piece lies d away from it
+        b = vertex.bisector.v
+        bs, bd = _edge_position((0.0, 0.0) + key[2:], b.x, b.y)
+        c = bs / bd if bd else 0.0
+        self._piece_motion[vertex] = (s - c * d, c)
+
+        pieces = self._edge_pieces[key]
+        pieces.insert(self.piece_index(pieces, s, d), vertex)
+
+    def remove_vertex(self, vertex):
+        """Remove an invalidated vertex from the edge index"""
+        self._edge_pieces[self.edge_key(vertex.edge_right)].remove(vertex)
+        del self._piece_motion[vertex]
+        if self.queue is not None:
+            self.queue.invalidated(vertex)
+
+    def piece_index(self, pieces, s, d):
+        """Bisect pieces for the first one that starts past position s at distance d
+
+        Pieces of one edge never pass each other, their order is the same at any d.
+        """
+        motion = self._piece_motion
+        lo, hi = 0, len(pieces)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            a, c = motion[pieces[mid]]
+            if s < a + c * d:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def first_piece(self, found, key):
+        """The piece (y, x) of found that a walk over the lavs reaches first
+
+        Pieces tie in degenerate footprints, this picks the one the scan over every
+        vertex picked before the edge index, testing a piece at x, or at y unless y
+        is also the x of another piece of the edge.
+        """
+        order = {v: i for i, v in enumerate(it.chain.from_iterable(self._lavs))}
+
+        def position(piece):
+            y, x = piece
+            if self.edge_key(y.edge_left) == key:
+                return order[x]
+            return min(order[x], order[y])
+
+        return min(found, key=position)
+
+    def snap(self, point):
+        """Move point onto an earlier snapped point closer than tol (robust mode only)"""
+        tol = self._tol
+        if not tol:
+            return point
+
+        cx, cy = math.floor(point.x / tol), math.floor(point.y / tol)
+        best, best_distance = None, tol
+        for cell in it.product((cx - 1, cx, cx + 1), (cy - 1, cy, cy + 1)):
+            for x, y in self._snap_cells.get(cell, ()):
+                distance = math.hypot(point.x - x, point.y - y)
+                if distance <= best_distance:
+                    best, best_distance = (x, y), distance
+
+        if best is None:
+            self._snap_cells[(cx, cy)].append((point.x, point.y))
+        else:
+            point.x, point.y = best
+        return point
+
+    def close_lavs(self):
+        """Meet every vertex of a lav without events left in one point
+
+        Many events in (nearly) one point, like at the center of a star, can leave
+        lavs whose bisectors no longer meet. Each such lav is closed at the mean of
+        its points. Lavs that never moved are left alone. Returns the new arcs.
+        """
+        original = {(e.edge.p.x, e.edge.p.y) for e in self._original_edges}
+        arcs = []
+        for lav in list(self._lavs):
+            vertices = list(lav)
+            if all((v.point.x, v.point.y) in original for v in vertices):
+                continue
+
+            points = [v.point for v in vertices]
+            x = sum(p.x for p in points) / len(points)
+            y = sum(p.y for p in points) / len(points)
+            height = sum(
+                _line_distance(_line_tuple(v.edge_left), x, y) for v in vertices
+            ) / len(vertices)
+
+            center = self.snap(Point2(x, y))
+            self._lavs.remove(lav)
+            for vertex in vertices:
+                self.end_vertex(vertex, center)
+            arcs.append(Subtree(center, height, points))
+        return arcs
+
+    def end_vertex(self, vertex, point):
+        """Invalidate vertex, recording the arc it traced up to point"""
+        if self._arcs is not None:
+            self._arcs.append(
+                (vertex.point, point, vertex.edge_left, vertex.edge_right)
+            )
+        vertex.invalidate()
+
+    def edge_faces(self, heights):
+        """Trace the face of every original edge from the recorded arcs
+
+        heights maps (x, y) of skeleton nodes to their height, faces that can not be
+        closed get polygon None.
+        """
+        # -- an arc traced twice along one edge (by two vertices) is a spur, not a side
+        counts = defaultdict(int)
+        for start, end, edge_left, edge_right in self._arcs:
+            a, b = (start.x, start.y), (end.x, end.y)
+            if a == b:
+                continue
+            for edge in (edge_left, edge_right):
+                counts[self.edge_key(edge), frozenset((a, b))] += 1
+
+        arcs = defaultdict(lambda: defaultdict(list))
+        for (key, pair), count in counts.items():
+            if count % 2:
+                a, b = pair
+                arcs[key][a].append(b)
+                arcs[key][b].append(a)
+
+        faces = []
+        for original in self._original_edges:
+            edge = original.edge
+            adjacency = arcs[self.edge_key(edge)]
+            # -- the bisectors start exactly at the points of the edge
+            start, end = original.bisector_left.p, original.bisector_right.p
+            first, last = (start.x, start.y), (end.x, end.y)
+
+            # -- walk back from the end of the edge to its start along the arcs
+            polygon = [first, last]
+            prev, current = first, last
+            while current != first:
+                candidates = [p for p in adjacency.get(current, ()) if p != prev]
+                if not candidates or len(polygon) > len(self._arcs) + 2:
+                    polygon = None
+                    break
+                adjacency[current].remove(candidates[0])
+                adjacency[candidates[0]].remove(current)
+                prev, current = current, candidates[0]
+                polygon.append(current)
+
+            if polygon is not None:
+                polygon = [(Point2(*p), heights.get(p, 0.0)) for p in polygon[:-1]]
+            faces.append(EdgeFace(edge, polygon))
+        return faces
+
     def handle_edge_event(self, event, zero_gradient):
         sinks = []
         events = []
@@ -649,7 +1261,7 @@ class SLAV:
             self._lavs.remove(lav)
             for vertex in list(lav):
                 sinks.append(vertex.point)
-                vertex.invalidate()
+                self.end_vertex(vertex, event.intersection_point)
         else:
             new_vertex = lav.unify(
                 event.vertex_a, event.vertex_b, event.intersection_point
@@ -689,47 +1301,23 @@ class SLAV:
 
         sinks = [event.vertex.point]
         vertices = []
-        x = None  # right vertex
-        y = None  # left vertex
-        norm = event.opposite_edge.v.normalized()
-        for v in it.chain.from_iterable(self._lavs):
-            if (
-                norm == v.edge_left.v.normalized()
-                and event.opposite_edge.p == v.edge_left.p
-            ):
-                x = v
-                y = x.prev
-            elif (
-                norm == v.edge_right.v.normalized()
-                and event.opposite_edge.p == v.edge_right.p
-            ):
-                y = v
-                x = y.next
-
-            if x:
-                xleft = (
-                    cross(
-                        y.bisector.v.normalized(),
-                        (event.intersection_point - y.point).normalized(),
-                    )
-                    >= 0
-                )
-                xright = (
-                    cross(
-                        x.bisector.v.normalized(),
-                        (event.intersection_point - x.point).normalized(),
-                    )
-                    <= 0
-                )
-
-                if xleft and xright:
-                    break
-                else:
-                    x = None
-                    y = None
-
-        if x is None:
+        # -- find the pieces (y, x) of the opposite edge whose bisectors enclose the
+        # -- intersection point, starting at the piece under it and moving outward
+        key = self.edge_key(event.opposite_edge)
+        pieces = self._edge_pieces.get(key, ())
+        point = event.intersection_point
+        index = self.piece_index(pieces, *_edge_position(key, point.x, point.y)) - 1
+        found = []
+        for i in _outward(index, len(pieces)):
+            y = pieces[i]
+            x = y.next
+            if self._strict and event.vertex in (x, y):
+                continue
+            if _is_between_bisectors(point, x, y, self._eps):
+                found.append((y, x))
+        if not found:
             return (None, [])
+        y, x = found[0] if len(found) == 1 else self.first_piece(found, key)
 
         v1 = LAVertex(
             event.intersection_point, event.vertex.edge_left, event.opposite_edge
@@ -737,6 +1325,8 @@ class SLAV:
         v2 = LAVertex(
             event.intersection_point, event.opposite_edge, event.vertex.edge_right
         )
+        self.add_vertex(v1)
+        self.add_vertex(v2)
 
         v1.prev = event.vertex.prev
         v1.next = x
@@ -764,7 +1354,7 @@ class SLAV:
             else:
                 sinks.append(l.head.next.point)
                 for v in list(l):
-                    v.invalidate()
+                    self.end_vertex(v, event.intersection_point)
 
         events = []
         for vertex in vertices:
@@ -772,11 +1362,13 @@ class SLAV:
             if next_event is not None:
                 events.append(next_event)
 
-        event.vertex.invalidate()
+        self.end_vertex(event.vertex, event.intersection_point)
         return (Subtree(event.intersection_point, event.distance, sinks), events)
 
 
 class LAV:
+    __slots__ = ["_len", "_slav", "head"]
+
     def __init__(self, slav):
         self.head = None
         self._slav = slav
@@ -791,6 +1383,7 @@ class LAV:
                 point, LineSegment2(prev, point), LineSegment2(point, next)
             )
             vertex.lav = lav
+            slav.add_vertex(vertex)
             if lav.head is None:
                 lav.head = vertex
                 vertex.prev = vertex.next = vertex
@@ -816,6 +1409,7 @@ class LAV:
         if self.head == vertex:
             self.head = self.head.next
         vertex.lav = None
+        self._slav.remove_vertex(vertex)
 
     def unify(self, vertex_a, vertex_b, point):
         replacement = LAVertex(
@@ -825,6 +1419,7 @@ class LAV:
             (vertex_b.bisector.v.normalized(), vertex_a.bisector.v.normalized()),
         )
         replacement.lav = self
+        self._slav.add_vertex(replacement)
 
         if self.head in [vertex_a, vertex_b]:
             self.head = replacement
@@ -834,8 +1429,8 @@ class LAV:
         replacement.prev = vertex_a.prev
         replacement.next = vertex_b.next
 
-        vertex_a.invalidate()
-        vertex_b.invalidate()
+        self._slav.end_vertex(vertex_a, point)
+        self._slav.end_vertex(vertex_b, point)
 
         self._len -= 1
         return replacement
@@ -851,11 +1446,13 @@ class LAV:
 
     def __iter__(self):
         cur = self.head
-        while True:
+        for _ in range(self._slav._created):
             yield cur
             cur = cur.next
             if cur == self.head:
                 return
+        # -- the chain runs into a loop that misses head
+        raise BrokenLavError("Skeleton lav does not close")
 
     def _show(self):
         cur = self.head
@@ -866,20 +1463,110 @@ class LAV:
                 break
 
 
+def _is_stale(event, neighbours=True):
+    """An event is stale once any vertex it was computed for has been invalidated, with
+    neighbours an edge event also once its vertices are no longer neighbours
+    """
+    if isinstance(event, EdgeEvent):
+        return not (
+            event.vertex_a.is_valid
+            and event.vertex_b.is_valid
+            and (not neighbours or event.vertex_a.next is event.vertex_b)
+        )
+    return not event.vertex.is_valid
+
+
+def _event_vertices(event):
+    if isinstance(event, EdgeEvent):
+        return event.vertex_a, event.vertex_b
+    return (event.vertex,)
+
+
 class EventQueue:
-    def __init__(self):
+    """
+    Priority queue of skeleton events with lazy invalidation.
+
+    LAVertex invalidation is one way, so the validity of its vertices acts as the
+    version of a queued event. Stale events are skipped when popped. The SLAV reports
+    every invalidated vertex through `invalidated`, which counts the queued events of
+    that vertex as stale, and the heap is compacted once it holds at least
+    `compact_size` events and `stale_ratio` of them are stale. `neighbours` also
+    drops edge events whose vertices are no longer neighbours (see _is_stale).
+    """
+
+    def __init__(self, stale_ratio=0.5, compact_size=256, neighbours=True):
         self.__data = []
+        self.stale_ratio = stale_ratio
+        self.compact_size = compact_size
+        self.neighbours = neighbours
+        # -- queued events by the vertices they were computed for, ids of the events
+        # -- in the heap and of those among them known to be stale
+        self._waiting = defaultdict(list)
+        self._queued = set()
+        self._stale = set()
+        self.pushed = 0
+        self.popped = 0
+        self.stale_skipped = 0
+        self.stale_dropped = 0
+        self.compacted = 0
+        self.edge_events = 0
+        self.split_events = 0
+        self.peak_size = 0
 
     def put(self, item):
         if item is not None:
-            heapq.heappush(self.__data, item)
+            self.put_all((item,))
 
     def put_all(self, iterable):
+        data = self.__data
         for item in iterable:
-            heapq.heappush(self.__data, item)
+            heapq.heappush(data, item)
+            self._queued.add(id(item))
+            for vertex in _event_vertices(item):
+                self._waiting[vertex].append(item)
+            self.pushed += 1
+
+        if len(data) > self.peak_size:
+            self.peak_size = len(data)
+
+    def invalidated(self, vertex):
+        """Count the queued events of vertex as stale, compact if enough of them are"""
+        for item in self._waiting.pop(vertex, ()):
+            if id(item) in self._queued:
+                self._stale.add(id(item))
+
+        size = len(self.__data)
+        if size >= self.compact_size and len(self._stale) >= self.stale_ratio * size:
+            self.compact()
+
+    def compact(self):
+        """Rebuild the heap without its stale events"""
+        live = [item for item in self.__data if not _is_stale(item, self.neighbours)]
+        self.stale_dropped += len(self.__data) - len(live)
+        self.compacted += 1
+        heapq.heapify(live)
+        self.__data = live
+        self._queued = {id(item) for item in live}
+        self._stale.clear()
 
     def get(self):
-        return heapq.heappop(self.__data)
+        """Pop the next live event, None if only stale events are left"""
+        data = self.__data
+        while data:
+            item = heapq.heappop(data)
+            self._queued.discard(id(item))
+            self._stale.discard(id(item))
+            self.popped += 1
+            if _is_stale(item, self.neighbours):
+                self.stale_skipped += 1
+                continue
+
+            if isinstance(item, EdgeEvent):
+                self.edge_events += 1
+            else:
+                self.split_events += 1
+            return item
+        return None
 
     def empty(self):
         return len(self.__data) == 0
@@ -887,46 +1574,616 @@ class EventQueue:
     def peek(self):
         return self.__data[0]
 
+    def stats(self):
+        return dict(
+            pushed=self.pushed,
+            popped=self.popped,
+            stale_skipped=self.stale_skipped,
+            stale_dropped=self.stale_dropped,
+            compacted=self.compacted,
+            edge_events=self.edge_events,
+            split_events=self.split_events,
+            peak_size=self.peak_size,
+        )
+
     def show(self):
         for item in self.__data:
             print(item)
 
 
-def skeletonize(polygon, holes=None, zero_gradient=False):
+def _np_normalized(x, y):
+    """Vectorized Vector2.normalized"""
+    d = np.sqrt(x * x + y * y)
+    nonzero = d != 0
+    d = np.where(nonzero, d, 1.0)
+    return np.where(nonzero, x / d, x), np.where(nonzero, y / d, y)
+
+
+def _np_intersect(a, b, a_ray=False, b_ray=False):
+    """Vectorized _intersect_line2_line2, lines are given as (px, py, vx, vy)"""
+    apx, apy, avx, avy = a
+    bpx, bpy, bvx, bvy = b
+    d = bvy * avx - bvx * avy
+    valid = d != 0
+    d = np.where(valid, d, 1.0)
+
+    dy = apy - bpy
+    dx = apx - bpx
+    ua = (bvx * dy - bvy * dx) / d
+    ub = (avx * dy - avy * dx) / d
+    if a_ray:
+        valid &= ua >= 0.0
+    if b_ray:
+        valid &= ub >= 0.0
+    return apx + ua * avx, apy + ua * avy, valid
+
+
+def _np_line_distance(line, x, y):
+    """Vectorized Line2.distance to the points (x, y)"""
+    px, py, vx, vy = line
+    u = ((x - px) * vx + (y - py) * vy) / (vx * vx + vy * vy)
+    dx = px + u * vx - x
+    dy = py + u * vy - y
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _np_point_distance(x1, y1, x2, y2):
+    """Vectorized Point2.distance"""
+    dx, dy = x2 - x1, y2 - y1
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _np_cross_normalized(line, x, y):
+    """cross(line.v.normalized(), (point - line.p).normalized())"""
+    px, py, vx, vy = line
+    ax, ay = _np_normalized(vx, vy)
+    bx, by = _np_normalized(x - px, y - py)
+    return ax * by - bx * ay
+
+
+def _np_lines(lines):
+    """Pack the origin and direction of lines into arrays"""
+    data = np.array([(l.p.x, l.p.y, l.v.x, l.v.y) for l in lines], dtype=float)
+    return tuple(data.reshape(-1, 4).T)
+
+
+def _np_rows(line, rows):
+    """Select rows of a packed line"""
+    return tuple(a[rows] for a in line)
+
+
+def initial_events(slav, chunk_size=250000):
+    """Compute the first event of every vertex in the slav in one batch
+
+    This is the NumPy equivalent of calling LAVertex.next_event on all the vertices.
+    The split events of a reflex vertex are tested against the same EdgeGrid candidates,
+    with the same operations in the same order, so the events are the same. Squares are
+    taken as x * x, like the lean float helpers do, while Vector2 keeps x**2 (libm pow),
+    so results can differ from code built on the Vector2 classes in the last bit.
+    Split events are tested in blocks of about chunk_size (vertex, edge) pairs.
+    """
+    vertices = list(it.chain.from_iterable(slav))
+    index = {id(v): i for i, v in enumerate(vertices)}
+    prev_idx = np.array([index[id(v.prev)] for v in vertices], dtype=int)
+    next_idx = np.array([index[id(v.next)] for v in vertices], dtype=int)
+
+    px = np.array([v.point.x for v in vertices], dtype=float)
+    py = np.array([v.point.y for v in vertices], dtype=float)
+    bisectors = _np_lines([v.bisector for v in vertices])
+    edge_left = _np_lines([v.edge_left for v in vertices])
+    edge_right = _np_lines([v.edge_right for v in vertices])
+
+    # -- edge events between each bisector and the bisectors of its neighbours
+    edge_events = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for other, edge in ((prev_idx, edge_left), (next_idx, edge_right)):
+            neighbour = tuple(a[other] for a in bisectors)
+            x, y, valid = _np_intersect(neighbour, bisectors, True, True)
+            key = np.where(valid, _np_point_distance(px, py, x, y), np.inf)
+            edge_events.append((x, y, key, _np_line_distance(edge, x, y)))
+
+    # -- split events for the reflex vertices, against the edges their bisector reaches
+    original = slav._original_edges
+    split = np.full(len(vertices), -1)
+    split_x, split_y = np.zeros(len(vertices)), np.zeros(len(vertices))
+    split_key = np.full(len(vertices), np.inf)
+    split_dist = np.zeros(len(vertices))
+
+    def split_block(rows, cols):
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        x, y, key, dist = _np_split_events(
+            px[rows],
+            py[rows],
+            _np_rows(bisectors, rows),
+            _np_rows(edge_left, rows),
+            _np_rows(edge_right, rows),
+            _np_rows(slav._edge_lines, cols),
+            _np_rows(slav._left_bisectors, cols),
+            _np_rows(slav._right_bisectors, cols),
+        )
+
+        # -- first closest split event per vertex, following the order of original edges
+        order = np.lexsort((key, rows))
+        best = order[np.unique(rows[order], return_index=True)[1]]
+        vertex = rows[best]
+        split[vertex] = cols[best]
+        split_x[vertex], split_y[vertex] = x[best], y[best]
+        split_key[vertex], split_dist[vertex] = key[best], dist[best]
+
+    rows, cols, pairs = [], [], 0
+    for i, vertex in enumerate(vertices):
+        if not vertex.is_reflex:
+            continue
+        indices = slav._edge_grid.query(vertex.point, vertex.bisector.v)
+        if not indices:
+            continue
+        rows.append(np.full(len(indices), i))
+        cols.append(np.array(indices, dtype=int))
+        pairs += len(indices)
+        if pairs >= chunk_size:
+            split_block(rows, cols)
+            rows, cols, pairs = [], [], 0
+    if rows:
+        split_block(rows, cols)
+
+    # -- pick the closest event per vertex, split events come first on ties
+    prev_x, prev_y, prev_key, prev_dist = edge_events[0]
+    next_x, next_y, next_key, next_dist = edge_events[1]
+    keys = np.stack([split_key, prev_key, next_key])
+    choice = np.argmin(keys, axis=0)
+    found = np.isfinite(keys.min(axis=0))
+
+    events = []
+    for i, vertex in enumerate(vertices):
+        if not found[i]:
+            continue
+        c = choice[i]
+        if c == 0:
+            point = Point2(float(split_x[i]), float(split_y[i]))
+            edge = original[split[i]].edge
+            events.append(SplitEvent(float(split_dist[i]), point, 0, vertex, edge))
+        elif c == 1:
+            point = Point2(float(prev_x[i]), float(prev_y[i]))
+            events.append(EdgeEvent(float(prev_dist[i]), point, 1, vertex.prev, vertex))
+        else:
+            point = Point2(float(next_x[i]), float(next_y[i]))
+            events.append(EdgeEvent(float(next_dist[i]), point, 1, vertex, vertex.next))
+    return events
+
+
+def _np_split_events(px, py, bisector, edge_left, edge_right, edges, lefts, rights):
+    """Vectorized LAVertex._split_events for pairs of vertices and original edges
+
+    Returns the event points, their distance from the vertex (inf if there is no event)
+    and their distance from the opposite edge.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # -- pick the vertex edge that is least parallel to the original edge
+        enx, eny = _np_normalized(edges[2], edges[3])
+        lnx, lny = _np_normalized(edge_left[2], edge_left[3])
+        rnx, rny = _np_normalized(edge_right[2], edge_right[3])
+        leftdot = np.abs(lnx * enx + lny * eny)
+        rightdot = np.abs(rnx * enx + rny * eny)
+        use_left = leftdot < rightdot
+        selfedge = tuple(
+            np.where(use_left, l, r) for l, r in zip(edge_left, edge_right)
+        )
+
+        ix, iy, valid = _np_intersect(edges, selfedge)
+
+        # -- discard intersections at (approximately) the vertex itself
+        same = (ix == px) & (iy == py)
+        scale = np.maximum(np.sqrt(ix * ix + iy * iy), np.sqrt(px * px + py * py))
+        near = _np_point_distance(ix, iy, px, py) <= scale * 0.001
+        valid &= ~(same | near)
+
+        # -- locate candidate b
+        lx, ly = _np_normalized(px - ix, py - iy)
+        flip = lx * enx + ly * eny < 0
+        ex, ey = np.where(flip, -enx, enx), np.where(flip, -eny, eny)
+        bx, by = ex + lx, ey + ly
+        valid &= np.sqrt(bx * bx + by * by) != 0
+
+        x, y, hit = _np_intersect(bisector, (ix, iy, bx, by), a_ray=True)
+        valid &= hit
+
+        valid &= _np_cross_normalized(lefts, x, y) > 0
+        valid &= _np_cross_normalized(rights, x, y) < 0
+        valid &= _np_cross_normalized(edges, x, y) < 0
+
+        key = np.where(valid, _np_point_distance(px, py, x, y), np.inf)
+        return x, y, key, _np_line_distance(edges, x, y)
+
+
+def skeletonize(
+    polygon, holes=None, zero_gradient=False, stats=None, robust=False, faces=None
+):
     """
     Compute the straight skeleton of a polygon.
 
     The polygon should be given as a list of vertices in counter-clockwise order.
     Holes is a list of the contours of the holes, the vertices of which should be in clockwise order.
     Zero gradient is an option to control the gradient between sinks and original_edges (produces gable roof)
+    Stats is an optional dict that gets updated with the event queue counters (see EventQueue.stats)
+    Robust merges (nearly) collinear and coincident input points and snaps event points that
+    are closer than ROBUST_EPS times the size of the polygon, for degenerate footprints
+    (ValueError if a contour is thinner than that and merges to fewer than 3 points)
+    Robust also drops edge events whose vertices are no longer neighbours and never lets a
+    split event pair a vertex with its own edges. The default mode starts over with these
+    rules only if its events break a lav (see BrokenLavError)
+    Faces is an optional list that gets extended with an EdgeFace for every edge of the polygon
+    (and holes), the polygon of an EdgeFace starts with the two points of its edge. Lavs left
+    without events are closed for the faces (see SLAV.close_lavs), not in the returned skeleton
 
     Returns the straight skeleton as a list of "subtrees", which are in the form of (source, height, sinks),
     where source is the highest points, height is its height, and sinks are the point connected to the source.
     """
-    slav = SLAV(polygon, holes)
+    tol = 0.0
+    if robust:
+        xs, ys = [p[0] for p in polygon], [p[1] for p in polygon]
+        tol = ROBUST_EPS * max(max(xs) - min(xs), max(ys) - min(ys))
+
+    args = (polygon, holes, zero_gradient, tol, faces is not None)
+    try:
+        slav, prioque, output = _run_events(*args, strict=robust)
+    except BrokenLavError:
+        if robust:
+            raise
+        slav, prioque, output = _run_events(*args, strict=True)
+
+    if stats is not None:
+        stats.update(prioque.stats())
+    if faces is not None:
+        # -- close the lavs for the faces only, the returned skeleton stays as it is
+        # -- (a polygon with the wrong orientation has no skeleton to complete)
+        closing = slav.close_lavs() if _signed_area(polygon) < 0 else []
+        heights = {(arc.source.x, arc.source.y): arc.height for arc in output + closing}
+        faces.extend(slav.edge_faces(heights))
+    return output
+
+
+def _run_events(polygon, holes, zero_gradient, tol, track_arcs, strict):
+    """Process the skeleton events of polygon, returns the SLAV, queue and arcs"""
+    slav = SLAV(polygon, holes, tol, track_arcs, strict)
     output = []
-    prioque = EventQueue()
+    prioque = EventQueue(neighbours=strict)
+    slav.queue = prioque
 
-    for lav in slav:
-        for vertex in lav:
-            v = vertex.next_event()
-            prioque.put(v)
+    prioque.put_all(initial_events(slav))
 
     while not (prioque.empty() or slav.empty()):
         i = prioque.get()
+        if i is None:
+            break
+
+        slav.snap(i.intersection_point)
         if isinstance(i, EdgeEvent):
-            if not i.vertex_a.is_valid or not i.vertex_b.is_valid:
-                continue
             (arc, events) = slav.handle_edge_event(i, zero_gradient)
-
-        elif isinstance(i, SplitEvent):
-            if not i.vertex.is_valid:
-                continue
+        else:
             (arc, events) = slav.handle_split_event(i)
 
         prioque.put_all(events)
 
         if arc is not None:
             output.append(arc)
+    return slav, prioque, output
 
-    return output
+
+def outset_polygon(polygon, distance):
+    """Move every edge of a clockwise polygon outwards by distance, like an even offset
+    inset of the faces around it. Returns None if two adjacent edges fold back.
+    """
+    pts = np.asarray(polygon, dtype=float)
+    dx, dy = _np_normalized(*(np.roll(pts, -1, axis=0) - pts).T)
+    # -- outward normal of every edge, the interior of a clockwise polygon is on the right
+    nx, ny = -dy, dx
+    px, py = np.roll(nx, 1), np.roll(ny, 1)
+
+    # -- mitre between the previous and next edge of every point
+    scale = 1.0 + px * nx + py * ny
+    if np.any(scale < 1e-9):
+        return None
+    return pts + distance * np.column_stack(((px + nx) / scale, (py + ny) / scale))
+
+
+def _segments_intersect(starts, ends, proper=False):
+    """Determine whether any two segments starts[i] -> ends[i] intersect, ignoring
+    pairs that share an end point. Proper only counts segments that cross each other,
+    not ones that touch or overlap on a common line.
+    """
+    a = np.asarray(starts, dtype=float).reshape(-1, 2)
+    b = np.asarray(ends, dtype=float).reshape(-1, 2)
+    d = b - a
+    eps = 1e-12 * float(np.max(np.abs(a - a.mean(axis=0)), initial=1.0)) ** 2
+    lo, hi = (1e-9, 1 - 1e-9) if proper else (0.0, 1.0)
+
+    for i in range(len(a) - 1):
+        r, q, s = d[i], a[i + 1 :] - a[i], d[i + 1 :]
+        shared = np.zeros(len(q), dtype=bool)
+        for p in (a[i], b[i]):
+            shared |= np.all(a[i + 1 :] == p, axis=1) | np.all(b[i + 1 :] == p, axis=1)
+
+        rxs = r[0] * s[:, 1] - r[1] * s[:, 0]
+        qxr = q[:, 0] * r[1] - q[:, 1] * r[0]
+        qxs = q[:, 0] * s[:, 1] - q[:, 1] * s[:, 0]
+        crossing = np.abs(rxs) > eps
+        rxs = np.where(crossing, rxs, 1.0)
+        t, u = qxs / rxs, qxr / rxs
+        hit = crossing & (t >= lo) & (t <= hi) & (u >= lo) & (u <= hi)
+        if np.any(hit & ~shared):
+            return True
+
+        if not proper:
+            # -- parallel segments on the same line must not overlap
+            rr = max(r @ r, eps)
+            t0 = (q @ r) / rr
+            t1 = t0 + (s @ r) / rr
+            overlap = (np.maximum(t0, t1) >= 0.0) & (np.minimum(t0, t1) <= 1.0)
+            if np.any(~crossing & (np.abs(qxr) <= eps) & overlap & ~shared):
+                return True
+    return False
+
+
+def is_simple_polygon(polygon):
+    """Determine whether the edges of a polygon only touch their neighbours"""
+    return not _segments_intersect(polygon, np.roll(polygon, -1, axis=0))
+
+
+def outset_is_safe(polygon, distance, zero_gradient=False, check_skeleton=True):
+    """Determine whether the roof of polygon outset by distance can be built, i.e the
+    outset polygon does not intersect itself and neither do the arcs of its skeleton
+    """
+    outset = outset_polygon(polygon, distance)
+    if outset is None or not is_simple_polygon(outset):
+        return False
+    if not check_skeleton:
+        return True
+
+    skeleton = skeletonize([tuple(p) for p in outset], [], zero_gradient)
+    arcs = [(arc.source, sink) for arc in skeleton for sink in arc.sinks]
+    starts = [(p.x, p.y) for p, _ in arcs]
+    ends = [(p.x, p.y) for _, p in arcs]
+    return not _segments_intersect(starts, ends, proper=True)
+
+
+def max_safe_outset(polygon, outset, zero_gradient=False, iterations=12):
+    """Find the largest outset, up to outset, for which outset_is_safe holds
+
+    Bisects between 0 and outset, so the result is within outset / 2**iterations of
+    the actual limit. Returns 0.0 if no outset is safe.
+    """
+    # -- arcs that already cross without outset can not be fixed by a smaller one
+    check = outset_is_safe(polygon, 0.0, zero_gradient)
+    if outset_is_safe(polygon, outset, zero_gradient, check):
+        return outset
+
+    lo, hi = 0.0, outset
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        if outset_is_safe(polygon, mid, zero_gradient, check):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _canonical_contour(points, origin, quantum):
+    """Quantize a contour relative to origin and rotate it to its smallest vertex"""
+    ox, oy = origin
+    contour = [
+        (round((x - ox) / quantum), round((y - oy) / quantum)) for x, y in points
+    ]
+    start = contour.index(min(contour))
+    return tuple(contour[start:] + contour[:start])
+
+
+class SkeletonCache:
+    """
+    LRU cache of skeletonize results keyed by the canonical footprint.
+
+    Footprints are quantized to `quantum` and made relative to their lowest vertex,
+    so rotated and translated copies of a footprint share an entry.
+    """
+
+    def __init__(self, maxsize=512, quantum=1e-5):
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, polygon, holes=None, zero_gradient=False):
+        """Return the canonical key of a footprint and the origin it is relative to"""
+        polygon = [(float(x), float(y)) for x, y in polygon]
+        q = self.quantum
+        origin = min(polygon, key=lambda p: (round(p[0] / q), round(p[1] / q)))
+        outer = _canonical_contour(polygon, origin, q)
+        inner = tuple(
+            sorted(_canonical_contour(hole, origin, q) for hole in holes or [])
+        )
+        return (outer, inner, bool(zero_gradient)), origin
+
+    def skeletonize(self, polygon, holes=None, zero_gradient=False):
+        """Cached skeletonize, results are translated to the position of polygon"""
+        key, origin = self.key(polygon, holes, zero_gradient)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            skeleton = skeletonize(polygon, holes, zero_gradient)
+            self._store(key, origin, skeleton)
+            return skeleton
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._translate(entry, origin, polygon, holes)
+
+    def skeletonize_many(self, polygons, zero_gradient=False, workers=None):
+        """Cached skeletonize_many, only footprints missing from the cache are computed"""
+        results = [None] * len(polygons)
+        missing = []
+        for i, polygon in enumerate(polygons):
+            key, origin = self.key(polygon, None, zero_gradient)
+            entry = self._entries.get(key)
+            if entry is None:
+                missing.append((i, key, origin))
+                continue
+            self.hits += 1
+            self._entries.move_to_end(key)
+            results[i] = self._translate(entry, origin, polygon, None)
+
+        if not missing:
+            return results
+
+        pending = [polygons[i] for i, _, _ in missing]
+        skeletons = skeletonize_many(
+            pending, zero_gradient=zero_gradient, workers=workers
+        )
+        for (i, key, origin), skeleton in zip(missing, skeletons):
+            self.misses += 1
+            self._store(key, origin, skeleton)
+            results[i] = skeleton
+        return results
+
+    def _store(self, key, origin, skeleton):
+        ox, oy = origin
+        self._entries[key] = [
+            (
+                (arc.source.x - ox, arc.source.y - oy),
+                arc.height,
+                [(s.x - ox, s.y - oy) for s in arc.sinks],
+            )
+            for arc in skeleton
+        ]
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _translate(self, entry, origin, polygon, holes):
+        # -- sinks on the footprint snap to its exact vertices
+        ox, oy = origin
+        q = self.quantum
+        exact = {
+            (round((x - ox) / q), round((y - oy) / q)): (x, y)
+            for x, y in it.chain(polygon, *(holes or []))
+        }
+
+        def point(x, y):
+            x, y = exact.get((round(x / q), round(y / q)), (x + ox, y + oy))
+            return Point2(float(x), float(y))
+
+        return [
+            Subtree(point(*source), height, [point(*s) for s in sinks])
+            for source, height, sinks in entry
+        ]
+
+    def info(self):
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._entries),
+        )
+
+    def clear(self):
+        self.hits = self.misses = 0
+        self._entries.clear()
+
+
+skeleton_cache = SkeletonCache()
+
+
+def skeletonize_cached(polygon, holes=None, zero_gradient=False):
+    """skeletonize through the shared SkeletonCache"""
+    return skeleton_cache.skeletonize(polygon, holes, zero_gradient)
+
+
+def _skeletonize_chunk(tasks):
+    """Worker for skeletonize_many, skeletons are sent back as plain tuples"""
+    return [
+        [
+            ((arc.source.x, arc.source.y), arc.height, [(s.x, s.y) for s in arc.sinks])
+            for arc in skeletonize(polygon, holes, zero_gradient)
+        ]
+        for polygon, holes, zero_gradient in tasks
+    ]
+
+
+def _unpack_skeleton(packed):
+    return [
+        Subtree(Point2(*source), height, [Point2(*s) for s in sinks])
+        for source, height, sinks in packed
+    ]
+
+
+def _skeletonize_serial(chunks):
+    """Skeletonize chunks of tasks in this process"""
+    for chunk in chunks:
+        for packed in _skeletonize_chunk(chunk):
+            yield _unpack_skeleton(packed)
+
+
+def iter_skeletonize(
+    polygons, holes=None, zero_gradient=False, workers=None, chunk_size=16
+):
+    """
+    Lazily skeletonize polygons in a process pool, yielding results in input order.
+
+    polygons can be any iterable, it is consumed `chunk_size` polygons at a time and
+    at most two chunks per worker are in flight. holes, if given, is a list with the
+    holes of each polygon. workers defaults to at most MAX_SKELETON_WORKERS
+    processes, workers=1 computes everything in this process.
+
+    Workers have to import this module. Where that fails, e.g. inside Blender under
+    the spawn start method (Windows, macOS) where bpy cannot be imported, the pool
+    breaks and the remaining polygons are skeletonized in this process instead. The
+    same goes for a module that was reloaded (as the test harness does), whose
+    functions can no longer be pickled for the workers.
+    """
+    tasks = (
+        (polygon, holes[i] if holes else [], zero_gradient)
+        for i, polygon in enumerate(polygons)
+    )
+    chunks = iter(lambda: list(it.islice(tasks, chunk_size)), [])
+
+    if workers == 1:
+        yield from _skeletonize_serial(chunks)
+        return
+
+    workers = workers or min(MAX_SKELETON_WORKERS, os.cpu_count() or 1)
+    queued = deque()  # -- chunks whose results have not been yielded yet
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = deque()
+            for chunk in chunks:
+                queued.append(chunk)
+                futures.append(executor.submit(_skeletonize_chunk, chunk))
+                if len(futures) < 2 * workers:
+                    continue
+                results = futures.popleft().result()
+                queued.popleft()
+                yield from map(_unpack_skeleton, results)
+
+            while futures:
+                results = futures.popleft().result()
+                queued.popleft()
+                yield from map(_unpack_skeleton, results)
+    except (
+        BrokenProcessPool,
+        OSError,
+        NotImplementedError,
+        pickle.PicklingError,
+        AttributeError,
+    ):
+        # -- the pool could not start, a task could not be sent or a worker died,
+        # -- finish in this process
+        yield from _skeletonize_serial(queued)
+        yield from _skeletonize_serial(chunks)
+
+
+def skeletonize_many(
+    polygons, holes=None, zero_gradient=False, workers=None, chunk_size=16
+):
+    """Skeletonize a batch of polygons in a process pool (see iter_skeletonize)"""
+    return list(iter_skeletonize(polygons, holes, zero_gradient, workers, chunk_size))
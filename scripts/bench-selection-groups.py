@@ -0,0 +1,107 @@
+# Benchmark get_selection_groups (btools/utils/util_mesh.py) against the
+# previous implementation, which regrew every group from scratch until it
+# stopped changing. Needs bmesh, so run it inside blender
+#
+#     blender -b -P scripts/bench-selection-groups.py -- --sizes 1000 10000 40000
+#
+# Every size builds a grid of (about) that many faces, selects rows of it in
+# bands (a few large groups) or as a checkerboard (many single face groups) and
+# prints one JSON object per line.
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import bmesh
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from btools.utils import get_selection_groups
+
+SIZES = (1000, 10000, 40000)
+PATTERNS = ("bands", "checker")
+
+
+def get_selection_groups_old(bm):
+    """get_selection_groups before it was rewritten as a breadth first search"""
+    selected_faces = [f for f in bm.faces if f.select]
+
+    def get_adjacent_selected(faces):
+        return list(
+            {fa for f in faces for e in f.edges for fa in e.link_faces if fa.select}
+        )
+
+    result = []
+    while selected_faces:
+        current = selected_faces[0]
+
+        faces = [current]
+        adjacent = get_adjacent_selected(faces)
+        while len(adjacent) > len(faces):
+            faces = adjacent[:]
+            adjacent = get_adjacent_selected(faces)
+
+        list(map(selected_faces.remove, adjacent))
+        result.append(adjacent)
+    return result
+
+
+def grid(size, pattern):
+    """bmesh with a grid of about size faces, selected following pattern"""
+    bm = bmesh.new()
+    segments = max(2, round(math.sqrt(size))) + 1
+    bmesh.ops.create_grid(bm, x_segments=segments, y_segments=segments, size=1)
+
+    for face in bm.faces:
+        center = face.calc_center_median()
+        row = round((center.y + 1) * (segments - 1) / 2)
+        col = round((center.x + 1) * (segments - 1) / 2)
+        if pattern == "bands":
+            face.select = row % 8 != 7
+        else:
+            face.select = (row + col) % 2 == 0
+    return bm
+
+
+def bench(func, bm, repeat):
+    """Time func on bm, return the best time and the number of groups"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        groups = func(bm)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(groups)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(
+        description="Time get_selection_groups on selections of a face grid"
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--patterns", nargs="+", choices=PATTERNS, default=PATTERNS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--old-max", type=int, default=10000, help="largest size to time the old code"
+    )
+    args = parser.parse_args(argv)
+
+    for pattern in args.patterns:
+        for size in args.sizes:
+            bm = grid(size, pattern)
+            record = {"pattern": pattern, "size": size, "faces": len(bm.faces)}
+            record["selected"] = sum(f.select for f in bm.faces)
+            record["time"], record["groups"] = bench(
+                get_selection_groups, bm, args.repeat
+            )
+            if size <= args.old_max:
+                record["time_old"], groups = bench(get_selection_groups_old, bm, 1)
+                assert groups == record["groups"]
+            print(json.dumps(record), flush=True)
+            bm.free()
+
+
+if __name__ == "__main__":
+    main()
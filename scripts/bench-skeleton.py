@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+#
+# Benchmark the straight skeleton (btools/utils/util_skeleton.py) outside of
+# blender. The module only depends on numpy, so it is loaded straight from its
+# file without importing the addon (and bpy).
+#
+# Each footprint/size pair prints one JSON object per line, for example
+#
+#     python scripts/bench-skeleton.py --shapes star comb --sizes 100 1000
+#
+# will time a star and a comb footprint of (about) 100 and 1000 vertices.
+
+import argparse
+import importlib.util
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+
+SKELETON_PATH = Path(__file__).parent.parent.joinpath(
+    "btools", "utils", "util_skeleton.py"
+)
+SIZES = (10, 50, 100, 500, 1000, 5000)
+
+
+def load_skeleton():
+    """Import util_skeleton without going through the btools package"""
+    spec = importlib.util.spec_from_file_location("util_skeleton", SKELETON_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# -- footprint generators, all return clockwise polygons of (about) n vertices
+
+
+def rectilinear(n, rnd):
+    """Random orthogonal footprint, a row of columns with random widths and heights"""
+    columns = max(1, (n - 2) // 2)
+    xs = [0.0]
+    for _ in range(columns):
+        xs.append(xs[-1] + rnd.uniform(0.5, 2.0))
+
+    heights = []
+    for _ in range(columns):
+        h = rnd.uniform(1.0, 6.0)
+        while heights and abs(h - heights[-1]) < 0.1:
+            h = rnd.uniform(1.0, 6.0)
+        heights.append(h)
+
+    points = [(xs[0], 0.0)]
+    for i, h in enumerate(heights):
+        points.extend([(xs[i], h), (xs[i + 1], h)])
+    points.append((xs[-1], 0.0))
+    return points
+
+
+def star(n, rnd):
+    """Star polygon with alternating (jittered) inner and outer radius"""
+    n = max(6, n - n % 2)
+    points = []
+    for i in range(n):
+        radius = (10.0 if i % 2 else 4.0) * rnd.uniform(0.9, 1.1)
+        angle = -2 * math.pi * i / n
+        points.append((radius * math.cos(angle), radius * math.sin(angle)))
+    return points
+
+
+def comb(n, rnd):
+    """Comb with n // 4 teeth, every tooth adds two reflex vertices"""
+    teeth = max(1, (n - 2) // 4)
+    points = [(0.0, 0.0), (0.0, 2.0)]
+    for t in range(teeth):
+        x = 2.0 * t
+        points.extend([(x + 1, 2.0), (x + 1, 6.0), (x + 2, 6.0), (x + 2, 2.0)])
+    points[-1] = (2.0 * teeth, 0.0)
+    return points
+
+
+def zigzag(n, rnd):
+    """Sawtooth roof line over a flat base"""
+    teeth = max(1, (n - 2) // 2)
+    points = [(0.0, 0.0), (0.0, 2.0)]
+    for t in range(teeth):
+        points.extend([(t + 0.5, 3.0), (t + 1.0, 2.0)])
+    points.append((float(teeth), 0.0))
+    return points
+
+
+def collinear(n, rnd, noise=1e-6):
+    """Rectangle with its edges split into many almost collinear segments"""
+    per_side = max(1, n // 4)
+    width, height = 20.0, 10.0
+    corners = [(0.0, 0.0), (0.0, height), (width, height), (width, 0.0)]
+
+    points = []
+    for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1]):
+        for i in range(per_side):
+            f = i / per_side
+            jitter = rnd.uniform(-noise, noise) if i else 0.0
+            # -- offset perpendicular to the side
+            nx, ny = (y2 - y1), -(x2 - x1)
+            length = math.hypot(nx, ny)
+            points.append(
+                (
+                    x1 + (x2 - x1) * f + nx / length * jitter,
+                    y1 + (y2 - y1) * f + ny / length * jitter,
+                )
+            )
+    return points
+
+
+SHAPES = {
+    "rectilinear": rectilinear,
+    "star": star,
+    "comb": comb,
+    "zigzag": zigzag,
+    "collinear": collinear,
+}
+
+
+def bench(skeleton, points, repeat):
+    """Time skeletonize on points, return the result record"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        skeleton.skeletonize(points, [])
+        timings.append(time.perf_counter() - start)
+
+    # -- separate run for allocations and events, tracemalloc slows things down
+    stats = {}
+    tracemalloc.start()
+    result = skeleton.skeletonize(points, [], stats=stats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "vertices": len(points),
+        "time_min": min(timings),
+        "time_mean": sum(timings) / len(timings),
+        "peak_kib": peak / 1024,
+        "subtrees": len(result),
+        **stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the straight skeleton on generated footprints"
+    )
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to file instead of stdout")
+    args = parser.parse_args()
+
+    skeleton = load_skeleton()
+    with open(args.output, "w") if args.output else nullcontext(sys.stdout) as out:
+        for shape in args.shapes:
+            for size in args.sizes:
+                points = SHAPES[shape](size, random.Random(args.seed))
+                record = {"shape": shape, "size": size, "seed": args.seed}
+                record.update(bench(skeleton, points, args.repeat))
+                record["python"] = platform.python_version()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+
+if __name__ == "__main__":
+    main()
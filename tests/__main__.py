@@ -14,6 +14,7 @@ try:
     import test_utils
     import test_floors
     import test_floorplan
+    import test_roofs
 except Exception:
     # XXX Error importing test modules.
     # Print Traceback and close blender process
@@ -36,6 +37,7 @@ def main():
     suite.addTests(loader.loadTestsFromModule(test_utils))
     suite.addTests(loader.loadTestsFromModule(test_floors))
     suite.addTests(loader.loadTestsFromModule(test_floorplan))
+    suite.addTests(loader.loadTestsFromModule(test_roofs))
 
     # initialize a runner, pass it your suite and run it
     runner = unittest.TextTestRunner(verbosity=3)
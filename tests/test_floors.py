@@ -1,7 +1,20 @@
 import bpy
+import bmesh
 import btools
 import random
 import unittest
+from mathutils import kdtree
+
+from btools.building.arch import ArchProperty
+from btools.building.array import ArrayProperty
+from btools.building.sizeoffset import SizeOffsetProperty
+from btools.building.fill import FillBars, FillPanel, FillLouver, FillGlassPanes
+
+from btools.building.door import DoorProperty
+from btools.building.door.door_ops import build as door_builder
+
+from btools.building.window import WindowProperty
+from btools.building.window.window_ops import build as window_builder
 
 from btools.building.floor import FloorProperty
 from btools.building.floor.floor_ops import build as floor_builder
@@ -9,6 +22,21 @@ from btools.building.floor.floor_ops import build as floor_builder
 from btools.building.floorplan import FloorplanProperty
 from btools.building.floorplan.floorplan_ops import build as floorplan_builder
 
+register_openings, unregister_openings = bpy.utils.register_classes_factory(
+    (
+        ArchProperty,
+        ArrayProperty,
+        SizeOffsetProperty,
+        FillBars,
+        FillPanel,
+        FillLouver,
+        FillGlassPanes,
+        DoorProperty,
+        WindowProperty,
+    )
+)
+
+
 class TestFloor(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -18,8 +46,16 @@ class TestFloor(unittest.TestCase):
         bpy.utils.register_class(FloorProperty)
         bpy.types.Scene.floor_prop = bpy.props.PointerProperty(type=FloorProperty)
 
+        register_openings()
+        bpy.types.Scene.door_prop = bpy.props.PointerProperty(type=DoorProperty)
+        bpy.types.Scene.window_prop = bpy.props.PointerProperty(type=WindowProperty)
+
     @classmethod
     def tearDownClass(cls):
+        del bpy.types.Scene.window_prop
+        del bpy.types.Scene.door_prop
+        unregister_openings()
+
         del bpy.types.Scene.floor_prop
         bpy.utils.unregister_class(FloorProperty)
 
@@ -90,3 +126,65 @@ class TestFloor(unittest.TestCase):
                 floor_res = floor_builder(context, prop)
                 self.assertEqual(floor_res, {"FINISHED"})
                 self.assertEqual(len(bm.faces), (floorplan_edges_count * 4) + 1)
+
+    def build_openings(self, builder, prop, walls, count=1, spread=0.0, size=None):
+        """Run builder on the walls of a three floor building, return its bmesh"""
+        context = bpy.context
+        context.scene.floorplan_prop.type = "RECTANGULAR"
+        floorplan_builder(context, context.scene.floorplan_prop)
+        bpy.ops.object.editmode_toggle()
+        context.scene.floor_prop.floor_count = 3
+        floor_builder(context, context.scene.floor_prop)
+
+        bm = bmesh.from_edit_mesh(btools.utils.get_edit_mesh())
+        selection = set(walls(bm))
+        for face in bm.faces:
+            face.select = face in selection
+        prop.array.count = count
+        prop.array.spread = spread
+        prop.init(btools.utils.get_selected_face_dimensions(context))
+        if size is not None:
+            prop.size_offset.size = size
+        self.assertEqual(builder(context, prop), {"FINISHED"})
+        return bmesh.from_edit_mesh(btools.utils.get_edit_mesh())
+
+    def walls(self, bm):
+        """The walls of every floor, not the slabs between them"""
+        return [
+            f
+            for f in bm.faces
+            if abs(f.normal.z) < 0.1 and btools.utils.calc_face_dimensions(f)[1] > 1
+        ]
+
+    def ground_wall(self, bm):
+        return [min(self.walls(bm), key=lambda f: f.calc_center_median().z)]
+
+    def coincident_verts(self, bm):
+        tree = kdtree.KDTree(len(bm.verts))
+        for i, v in enumerate(bm.verts):
+            tree.insert(v.co, i)
+        tree.balance()
+        return sum(len(tree.find_range(v.co, 0.0001)) - 1 for v in bm.verts)
+
+    def test_floors_openings_weld(self):
+        # -- the door and window frames are welded to the walls they are cut into
+        door_prop = bpy.context.scene.door_prop
+        window_prop = bpy.context.scene.window_prop
+        for builder, prop, faces, count, spread in (
+            (door_builder, door_prop, self.ground_wall, 1, 0.0),
+            (window_builder, window_prop, self.walls, 1, 0.0),
+            (window_builder, window_prop, self.walls, 3, 0.0),
+            (window_builder, window_prop, self.walls, 3, 0.5),
+        ):
+            bm = self.build_openings(builder, prop, faces, count, spread)
+            self.assertEqual(self.coincident_verts(bm), 0)
+
+            bpy.ops.object.editmode_toggle()
+            self.clear_objects()
+
+    def test_floors_full_height_door(self):
+        # -- no row is left above a door as tall as its wall
+        prop = bpy.context.scene.door_prop
+        bm = self.build_openings(door_builder, prop, self.ground_wall, size=(1.0, 2.0))
+        self.assertEqual(self.coincident_verts(bm), 0)
+        self.assertFalse([f for f in bm.faces if f.calc_area() < 0.0001])
@@ -0,0 +1,172 @@
+import unittest
+
+import bpy
+from mathutils import Vector
+
+import btools
+from btools.building.materialgroup import MaterialGroup
+from btools.building.roof import RoofProperty, clear_roof_topology_cache, roof_types
+from btools.building.roof.roof_ops import build as roof_builder
+
+
+class TestRoof(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        bpy.utils.register_class(RoofProperty)
+        bpy.types.Scene.roof_prop = bpy.props.PointerProperty(type=RoofProperty)
+
+    @classmethod
+    def tearDownClass(cls):
+        del bpy.types.Scene.roof_prop
+        bpy.utils.unregister_class(RoofProperty)
+
+    def setUp(self):
+        self.clear_objects()
+        self.defaults = btools.utils.dict_from_prop(bpy.context.scene.roof_prop)
+
+    def tearDown(self):
+        # -- restore test_prop to previous state
+        for key, val in self.defaults.items():
+            setattr(bpy.context.scene.roof_prop, key, val)
+
+        if bpy.context.mode == "EDIT_MESH":
+            bpy.ops.object.editmode_toggle()
+        self.clear_objects()
+
+    def clear_objects(self):
+        [bpy.data.objects.remove(o) for o in bpy.data.objects]
+
+    def build_footprints(self, xs=(-3, 3)):
+        """Disjoint square faces centered at xs, selected in edit mode"""
+        obj = btools.utils.create_object(
+            "roofs", btools.utils.create_mesh("roofs_mesh")
+        )
+        bm = btools.utils.bm_from_obj(obj)
+        for x in xs:
+            verts = btools.utils.plane(bm, 2, 2)["verts"]
+            btools.utils.translate_verts([(verts, Vector((x, 0, 0)))])
+        btools.utils.bm_to_obj(bm, obj)
+        btools.utils.link_obj(obj)
+
+        # switch to edit mode
+        bpy.ops.object.editmode_toggle()
+        with btools.utils.bmesh_from_active_object() as bm:
+            btools.utils.select(bm.faces)
+        return obj
+
+    def roof_faces(self, obj, bm):
+        """Faces in the ROOF material group, by the side (x) of their footprint"""
+        name = MaterialGroup.ROOF.name.lower()
+        index = [mt.index for mt in obj.bt_materials if mt.name == name].pop()
+        layer = bm.faces.layers.int.get(".bt_material_group_index")
+
+        sides = {-1: [], 1: []}
+        for f in bm.faces:
+            if f[layer] == index:
+                sides[1 if f.calc_center_median().x > 0 else -1].append(f)
+        return sides
+
+    def test_roofs_multi_region(self):
+        context = bpy.context
+        prop = context.scene.roof_prop
+        for roof_type, gable_type in [
+            ("HIP", "BOX"),
+            ("GABLE", "BOX"),
+            ("GABLE", "OPEN"),
+        ]:
+            prop.type = roof_type
+            prop.gable_type = gable_type
+            obj = self.build_footprints()
+
+            with btools.utils.bmesh_from_active_object(context) as bm:
+                # build both roofs in one operation
+                self.assertEqual(roof_builder(context, prop), {"FINISHED"})
+
+                for side, faces in self.roof_faces(obj, bm).items():
+                    self.assertTrue(faces, (roof_type, gable_type, side))
+
+                    # -- each roof stays over its own footprint and has no holes
+                    verts = {v for f in faces for v in f.verts}
+                    self.assertTrue(all(v.co.x * side > 0 for v in verts))
+                    self.assertGreater(max(v.co.z for v in verts), prop.height)
+                    # -- only the footprint outline may stay open (open gables)
+                    edges = [e for f in faces for e in f.edges if e.is_boundary]
+                    self.assertTrue(all(v.co.z == 0 for e in edges for v in e.verts))
+
+            # switch back to object mode
+            bpy.ops.object.editmode_toggle()
+            self.clear_objects()
+
+    def test_roof_height_redo(self):
+        context = bpy.context
+        prop = context.scene.roof_prop
+        prop.type = "HIP"
+        roof_types.roof_topology_cache.clear()
+
+        tops, counts = [], []
+        for height in (1, 2):
+            prop.height = height
+            obj = self.build_footprints()
+
+            with btools.utils.bmesh_from_active_object(context) as bm:
+                self.assertEqual(roof_builder(context, prop), {"FINISHED"})
+                sides = self.roof_faces(obj, bm)
+                counts.append([len(faces) for faces in sides.values()])
+                tops.append(max(v.co.z for f in sides[-1] for v in f.verts))
+
+            # switch back to object mode
+            bpy.ops.object.editmode_toggle()
+            self.clear_objects()
+
+        # -- the first roof is reused for its translated copy and for the redo
+        cache = roof_types.roof_topology_cache.info()
+        self.assertEqual((cache["misses"], cache["hits"]), (1, 3))
+        self.assertEqual(counts[0], counts[1])
+        self.assertAlmostEqual(tops[1] - tops[0], 1, places=4)
+
+        # -- loading another file drops the roofs of this one
+        clear_roof_topology_cache(None)
+        self.assertEqual(len(roof_types.roof_topology_cache), 0)
+
+    def test_gable_roof_single(self):
+        context = bpy.context
+        prop = context.scene.roof_prop
+        prop.type = "GABLE"
+        for gable_type in ("BOX", "OPEN"):
+            prop.gable_type = gable_type
+            self.build_footprints(xs=(0,))
+
+            with btools.utils.bmesh_from_active_object(context) as bm:
+                self.assertEqual(roof_builder(context, prop), {"FINISHED"})
+
+                # -- the roof slopes are extruded up by the roof thickness
+                top = max(v.co.z for v in bm.verts)
+                self.assertGreater(top, prop.height + prop.thickness / 2)
+
+            # switch back to object mode
+            bpy.ops.object.editmode_toggle()
+            self.clear_objects()
+
+    def test_roofs_same_footprint(self):
+        context = bpy.context
+        prop = context.scene.roof_prop
+        prop.type = "HIP"
+        roof_types.roof_topology_cache.clear()
+
+        polygons = []
+        skeletonize_regions = roof_types.skeletonize_regions
+
+        def record(regions, *args):
+            polygons.extend(regions)
+            return skeletonize_regions(regions, *args)
+
+        roof_types.skeletonize_regions = record
+        try:
+            self.build_footprints()
+            with btools.utils.bmesh_from_active_object(context):
+                self.assertEqual(roof_builder(context, prop), {"FINISHED"})
+        finally:
+            roof_types.skeletonize_regions = skeletonize_regions
+
+        # -- both footprints are the same square, only the first is skeletonized
+        self.assertEqual(len(polygons), 1)
@@ -1,6 +1,7 @@
 import bmesh
 import bpy
 import btools
+import concurrent.futures.process
 import math
 import random
 import unittest
@@ -271,6 +272,27 @@ class TestUtilsMesh(unittest.TestCase):
         self.assertEqual(len([e for e in self.bm.edges if btools.utils.edge_is_horizontal(e)]), 8)
         self.assertEqual(len([e for e in self.bm.edges if btools.utils.edge_is_sloped(e)]), 0)
 
+    def test_edge_table(self):
+        # -- sloped and horizontal edges, the caps and the plane are in 2D space
+        btools.utils.cone(self.bm)
+        btools.utils.plane(self.bm)
+
+        table = btools.utils.EdgeTable(self.bm.edges)
+        for e in self.bm.edges:
+            self.assertEqual(table.is_vertical(e), btools.utils.edge_is_vertical(e))
+            self.assertEqual(table.is_horizontal(e), btools.utils.edge_is_horizontal(e))
+            self.assertEqual(table.is_sloped(e), btools.utils.edge_is_sloped(e))
+
+        for f in self.bm.faces:
+            self.assertEqual(
+                table.filter_vertical(f.edges),
+                btools.utils.filter_vertical_edges(f.edges),
+            )
+            self.assertEqual(
+                table.filter_horizontal(f.edges),
+                btools.utils.filter_horizontal_edges(f.edges),
+            )
+
     def test_vec_equalopposite(self):
         LEFT = Vector((-1, 0, 0))
         RIGHT = Vector((1, 0, 0))
@@ -328,6 +350,206 @@ class TestUtilsMesh(unittest.TestCase):
         btools.utils.cube(self.bm)
         self.assertEqual(btools.utils.calc_faces_median(self.bm.faces), Vector())
 
+    def test_face_with_verts(self):
+        btools.utils.cube(self.bm)
+        for face in self.bm.faces:
+            verts = list(reversed(face.verts))
+            self.assertEqual(btools.utils.face_with_verts(self.bm, verts), face)
+            # -- in any order, not only around the face
+            shuffled = [verts[0], verts[2], verts[1], verts[3]]
+            self.assertEqual(btools.utils.face_with_verts(self.bm, shuffled), face)
+            self.assertIsNone(btools.utils.face_with_verts(self.bm, verts[:3]))
+
+    def test_closest_faces(self):
+        btools.utils.cube(self.bm)
+        faces = list(self.bm.faces)
+        locations = [f.calc_center_bounds() for f in reversed(faces)]
+        self.assertEqual(btools.utils.closest_faces(faces, locations), faces[::-1])
+        self.assertEqual(btools.utils.closest_faces(faces, [Vector((5, 5, 5))]), [None])
+
+        # -- two faces at the same location can not be told apart
+        self.clean_bmesh()
+        btools.utils.plane(self.bm)
+        btools.utils.plane(self.bm)
+        with self.assertRaises(ValueError):
+            btools.utils.closest_faces(self.bm.faces, [Vector()])
+
+    def test_translate_verts(self):
+        btools.utils.plane(self.bm)
+        verts = list(self.bm.verts)
+        start = [v.co.copy() for v in verts]
+
+        x, y = Vector((1, 0, 0)), Vector((0, 1, 0))
+        btools.utils.translate_verts([(verts[:2], x), (verts[1:3], y)])
+        self.assertEqual(verts[0].co, start[0] + x)
+        self.assertEqual(verts[1].co, start[1] + x + y)
+        self.assertEqual(verts[2].co, start[2] + y)
+        self.assertEqual(verts[3].co, start[3])
+
+    def test_subdivide_face_into_grid(self):
+        btools.utils.plane(self.bm)
+        face = list(self.bm.faces)[0]
+        area, normal = face.calc_area(), face.normal.copy()
+
+        rows = btools.utils.subdivide_face_into_grid(self.bm, face, [1, 2, 1], [1, 3])
+        self.assertEqual(len(self.bm.faces), 6)
+        for row, h in zip(rows, [1, 3]):
+            for f, w in zip(row, [1, 2, 1]):
+                f.normal_update()
+                self.assertEqual(len(f.verts), 4)
+                self.assertEqual(f.normal, normal)
+                self.assertAlmostEqual(f.calc_area(), area * w / 4 * h / 4, places=4)
+
+    def test_subdivide_face_into_grid_not_rectangle(self):
+        # -- a gable wall, the top row of cells is cut off by the roof slopes
+        coords = [(0, 0, 0), (4, 0, 0), (4, 2, 0), (2, 3, 0), (0, 2, 0)]
+        face = self.bm.faces.new([self.bm.verts.new(co) for co in coords])
+        face.normal_update()
+        normal = face.normal.copy()
+
+        rows = btools.utils.subdivide_face_into_grid(self.bm, face, [1, 2, 1], [1, 3])
+        self.assertEqual([len(row) for row in rows], [3, 3])
+        self.assertEqual(len(self.bm.faces), 6)
+        for f in (f for row in rows for f in row):
+            f.normal_update()
+            self.assertEqual(f.normal, normal)
+        self.assertAlmostEqual(sum(f.calc_area() for f in self.bm.faces), 10, places=4)
+
+        # -- a corner of a triangle has no room for its cell, it shares the one above
+        coords = [(0, 0, 1), (4, 0, 1), (2, 3, 1)]
+        face = self.bm.faces.new([self.bm.verts.new(co) for co in coords])
+        face.normal_update()
+        rows = btools.utils.subdivide_face_into_grid(self.bm, face, [1, 2, 1], [1, 3])
+        self.assertEqual(len({f for row in rows for f in row}), 5)
+        self.assertIs(rows[0][2], rows[1][2])
+
+    def test_subdivide_face_into_grid_empty_cells(self):
+        def check(rows, faces):
+            self.assertEqual(len(self.bm.faces), faces)
+            coords = {v.co.to_tuple(4) for v in self.bm.verts}
+            self.assertEqual(len(coords), len(self.bm.verts))
+            for f in self.bm.faces:
+                self.assertGreater(f.calc_area(), 0.0001)
+            self.assertIs(rows[0][1], rows[1][1])
+
+        # -- a full height door, the row above it has no height
+        btools.utils.plane(self.bm, 4, 2)
+        face = list(self.bm.faces)[0]
+        area = face.calc_area()
+        rows = btools.utils.subdivide_face_into_grid(
+            self.bm, face, [1.5, 1, 1.5], [2, 0]
+        )
+        check(rows, 3)
+        self.assertAlmostEqual(rows[0][1].calc_area(), area / 4, places=4)
+
+        # -- a door on a slab face that is not a rectangle, with a negative row on top
+        self.clean_bmesh()
+        coords = [(0, 0, 0), (4, 0, 0), (4, 0, 0.2), (0.5, 0, 0.2), (0, 0, 0.1)]
+        face = self.bm.faces.new([self.bm.verts.new(co) for co in coords])
+        face.normal_update()
+        rows = btools.utils.subdivide_face_into_grid(
+            self.bm, face, [1.5, 1, 1.5], [0.2, -0.001]
+        )
+        check(rows, 3)
+        self.assertAlmostEqual(rows[0][1].calc_area(), 0.2, places=4)
+
+    def test_geometry_cache(self):
+        btools.utils.plane(self.bm)
+        face = list(self.bm.faces)[0]
+        center = btools.utils.face_center_median
+        with btools.utils.geometry_cache(self.bm) as cache:
+            center(face).x += 1  # -- callers get copies
+            self.assertEqual(center(face), face.calc_center_median())
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # -- editing the mesh with a util_mesh helper drops the results
+            btools.utils.translate_verts([(face.verts, Vector((0, 0, 1)))])
+            self.assertEqual(center(face), face.calc_center_median())
+            self.assertEqual((cache.generation, cache.misses), (1, 2))
+
+            # -- and so does editing it with bmesh.ops, which does not bump it
+            dimensions = btools.utils.calc_face_dimensions
+            before = dimensions(face)
+            bmesh.ops.scale(self.bm, vec=(2, 1, 1), verts=list(face.verts))
+            bmesh.ops.translate(self.bm, vec=(1, 0, 0), verts=list(face.verts))
+            self.assertEqual(center(face), face.calc_center_median())
+            self.assertEqual(dimensions(face), dimensions.__wrapped__(face))
+            self.assertNotEqual(dimensions(face), before)
+            self.assertEqual(cache.generation, 1)
+        self.assertIsNone(btools.utils.util_mesh._geometry_cache)
+
+    def test_mesh_region(self):
+        bmesh.ops.create_grid(self.bm, x_segments=3, y_segments=3, size=3)
+        middle = min(self.bm.faces, key=lambda f: f.calc_center_median().length)
+        with btools.utils.MeshRegion(self.bm, [middle]) as region:
+            inset = bmesh.ops.inset_individual(self.bm, faces=[middle], thickness=0.1)
+
+        # -- the faces built inside the start face, not the ones around it
+        self.assertEqual(set(region), {middle} | set(inset["faces"]))
+
+        verts = btools.utils.plane(self.bm)["verts"]
+        faces = {f for v in verts for f in v.link_faces}
+        region.add(faces)
+        self.assertTrue(faces < set(region))
+
+    def test_cleanup_remove_doubles(self):
+        # -- two pairs of loose quads side by side, only the first pair is in the region
+        pairs = []
+        for y in (0, 5):
+            pairs.append([])
+            for x in (0, 1):
+                corners = [(x, y), (x + 1, y), (x + 1, y + 1), (x, y + 1)]
+                verts = [self.bm.verts.new((cx, cy, 0)) for cx, cy in corners]
+                pairs[-1].append(self.bm.faces.new(verts))
+
+        def joined(y):
+            verts = [v for v in self.bm.verts if v.co.y // 5 == y // 5]
+            edges = {e for v in verts for e in v.link_edges}
+            return len(verts), sum(len(e.link_faces) == 2 for e in edges)
+
+        btools.utils.cleanup_remove_doubles(self.bm, pairs[0], dist=0.0001)
+        self.assertEqual(joined(0), (6, 1))
+        self.assertEqual(joined(5), (8, 0))
+
+        btools.utils.util_mesh.FULL_MESH_CLEANUP = True
+        try:
+            btools.utils.cleanup_remove_doubles(self.bm, [], dist=0.0001)
+        finally:
+            btools.utils.util_mesh.FULL_MESH_CLEANUP = False
+        self.assertEqual(joined(5), (6, 1))
+
+    def test_cleanup_face_normals(self):
+        # -- cube with inward normals, except for its top
+        btools.utils.cube(self.bm)
+        bmesh.ops.reverse_faces(self.bm, faces=list(self.bm.faces))
+        self.bm.normal_update()
+        top = max(self.bm.faces, key=lambda f: f.calc_center_median().z)
+        top.normal_flip()
+        normals = {f: f.normal.copy() for f in self.bm.faces if f is not top}
+
+        # -- the top is flipped to match the faces around it, they keep theirs
+        btools.utils.cleanup_face_normals(self.bm, [top])
+        self.assertLess(top.normal.z, 0)
+        for face, normal in normals.items():
+            self.assertGreater(face.normal.dot(normal), 0.99)
+
+    def test_cleanup_face_normals_ring(self):
+        # -- the ring keeps its orientation, the region follows most of it
+        for inward, up in ((1, True), (3, False)):
+            self.clean_bmesh()
+            btools.utils.cube(self.bm)
+            self.bm.normal_update()
+            top = max(self.bm.faces, key=lambda f: f.calc_center_median().z)
+            sides = [f for f in self.bm.faces if abs(f.normal.z) < 0.5]
+            for face in sides[:inward]:
+                face.normal_flip()
+            normals = {f: f.normal.copy() for f in sides}
+
+            btools.utils.cleanup_face_normals(self.bm, [top])
+            self.assertEqual(top.normal.z > 0, up)
+            for face, normal in normals.items():
+                self.assertGreater(face.normal.dot(normal), 0.99)
+
 
 class TestUtilsEvent(unittest.TestCase):
 
@@ -379,3 +601,261 @@ class TestUtilsEvent(unittest.TestCase):
 
         self.event_manager.dispatch("resized")
         self.assertEqual(prop.resized, False)
+
+
+class BrokenPool:
+    """Stand-in for ProcessPoolExecutor whose workers always die"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        future.set_exception(concurrent.futures.process.BrokenProcessPool())
+        return future
+
+
+class TestUtilsSkeleton(unittest.TestCase):
+    def test_skeletonize_stats(self):
+        # -- L shaped footprint, clockwise
+        points = [(0, 0), (0, 4), (2, 4), (2, 2), (4, 2), (4, 0)]
+        stats = dict()
+        skeleton = btools.utils.skeletonize(points, [], stats=stats)
+
+        self.assertTrue(skeleton)
+        self.assertLessEqual(stats["popped"], stats["pushed"])
+        self.assertEqual(
+            stats["edge_events"] + stats["split_events"] + stats["stale_skipped"],
+            stats["popped"],
+        )
+        self.assertLessEqual(stats["peak_size"], stats["pushed"])
+        self.assertLessEqual(stats["popped"] + stats["stale_dropped"], stats["pushed"])
+
+    def test_event_queue_compact(self):
+        skeleton = btools.utils.util_skeleton
+        queue = skeleton.EventQueue(stale_ratio=0.5, compact_size=4)
+
+        class Vertex:
+            is_valid = True
+
+        vertices = [Vertex() for _ in range(4)]
+        queue.put_all(
+            skeleton.SplitEvent(i, None, 0, v, None) for i, v in enumerate(vertices)
+        )
+        # -- compacts once half of the queued events are stale
+        for vertex in vertices[:2]:
+            vertex.is_valid = False
+            queue.invalidated(vertex)
+
+        stats = queue.stats()
+        self.assertEqual((stats["compacted"], stats["stale_dropped"]), (1, 2))
+        self.assertEqual([queue.get().vertex for _ in range(2)], vertices[2:])
+        self.assertTrue(queue.empty())
+        self.assertEqual((queue.popped, queue.stale_skipped), (2, 0))
+
+    def test_initial_events(self):
+        skeleton = btools.utils.util_skeleton
+        # -- orthogonal footprint of columns with different heights, and a comb
+        heights = [3, 5, 2, 6, 4, 1.5, 5.5, 2.5, 4.5, 3.5]
+        rectilinear = [(0, 0)]
+        for i, h in enumerate(heights):
+            rectilinear.extend([(i, h), (i + 1, h)])
+        rectilinear.append((len(heights), 0))
+        comb = [(0, 0), (0, 2), (41, 2), (41, 0)]
+        for t in range(20, 0, -1):
+            comb[2:2] = [(2 * t - 1, 2), (2 * t - 1, 6), (2 * t, 6), (2 * t, 2)]
+
+        # -- the batch finds the same events as next_event, also split over blocks
+        for points in (rectilinear, comb):
+            slav = skeleton.SLAV(points, [])
+            expected = [v.next_event() for lav in slav for v in lav]
+            expected = [event for event in expected if event is not None]
+            self.assertEqual(skeleton.initial_events(slav), expected)
+            self.assertEqual(skeleton.initial_events(slav, chunk_size=16), expected)
+
+    def test_split_batch(self):
+        # -- every split candidate of a star is tested with NumPy or one at a time
+        star = [
+            (r * math.cos(-math.pi * i / 25), r * math.sin(-math.pi * i / 25))
+            for i, r in enumerate([4, 10] * 25)
+        ]
+        util_skeleton = btools.utils.util_skeleton
+        batch_size = util_skeleton.SPLIT_BATCH_SIZE
+        results = []
+        for size in (0, len(star)):
+            util_skeleton.SPLIT_BATCH_SIZE = size
+            try:
+                skeleton = btools.utils.skeletonize(star, [])
+            finally:
+                util_skeleton.SPLIT_BATCH_SIZE = batch_size
+            results.append([(arc.source, arc.height, arc.sinks) for arc in skeleton])
+        self.assertEqual(results[0], results[1])
+
+    def test_skeleton_cache(self):
+        cache = btools.utils.util_skeleton.SkeletonCache()
+        points = [(0, 0), (0, 4), (2, 4), (2, 2), (4, 2), (4, 0)]
+        skeleton = cache.skeletonize(points)
+
+        # -- translated and rotated copy of the footprint shares the entry
+        moved = [(x + 10, y - 5) for x, y in points[2:] + points[:2]]
+        moved_skeleton = cache.skeletonize(moved)
+        self.assertEqual(cache.info()["hits"], 1)
+        self.assertEqual(cache.info()["misses"], 1)
+        for arc, moved_arc in zip(skeleton, moved_skeleton):
+            self.assertAlmostEqual(arc.source.x + 10, moved_arc.source.x)
+            self.assertAlmostEqual(arc.source.y - 5, moved_arc.source.y)
+
+        # -- only footprints missing from the cache are computed in a batch
+        rect = [(0, 0), (0, 2), (4, 2), (4, 0)]
+        batch = cache.skeletonize_many([moved, rect], workers=1)
+        self.assertEqual(cache.info()["hits"], 2)
+        self.assertEqual(cache.info()["misses"], 2)
+        self.assertEqual(
+            [arc.source for arc in batch[0]], [arc.source for arc in moved_skeleton]
+        )
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_skeletonize_many(self):
+        footprints = [
+            [(0, 0), (0, 4), (2, 4), (2, 2), (4, 2), (4, 0)],
+            [(0, 0), (0, 2), (4, 2), (4, 0)],
+        ]
+        expected = [btools.utils.skeletonize(points, []) for points in footprints]
+        sources = [[arc.source for arc in skeleton] for skeleton in expected]
+
+        # -- in this process, in a pool, and in this process after the pool broke
+        results = [
+            btools.utils.skeletonize_many(footprints, workers=1),
+            btools.utils.skeletonize_many(footprints, workers=2, chunk_size=1),
+        ]
+        util_skeleton = btools.utils.util_skeleton
+        executor = util_skeleton.ProcessPoolExecutor
+        util_skeleton.ProcessPoolExecutor = BrokenPool
+        try:
+            results.append(btools.utils.skeletonize_many(footprints, workers=2))
+        finally:
+            util_skeleton.ProcessPoolExecutor = executor
+
+        for result in results:
+            self.assertEqual([[arc.source for arc in s] for s in result], sources)
+
+    def test_skeletonize_robust(self):
+        # -- rectangle with almost collinear points in the middle of the long sides
+        points = [(0, 0), (0, 2), (2, 2 + 1e-9), (4, 2), (4, 0), (2, 1e-9)]
+        stats, robust_stats = dict(), dict()
+        skeleton = btools.utils.skeletonize(points, [], stats=stats)
+        robust = btools.utils.skeletonize(points, [], stats=robust_stats, robust=True)
+
+        self.assertLess(len(robust), len(skeleton))
+        self.assertLess(robust_stats["pushed"], stats["pushed"])
+        self.assertEqual(
+            sorted((arc.source.x, arc.source.y) for arc in robust),
+            [(1.0, 1.0), (3.0, 1.0)],
+        )
+
+        # -- sliver thinner than the tolerance merges away completely
+        sliver = [(0, 0), (0, 1e-7), (1, 1e-7), (2, 1e-7), (2, 0), (1, 0)]
+        self.assertEqual(len(btools.utils.skeletonize(sliver, [])), 2)
+        with self.assertRaisesRegex(ValueError, "fewer than 3 points"):
+            btools.utils.skeletonize(sliver, [], robust=True)
+
+    def test_skeletonize_default_mode(self):
+        # -- edge events of vertices that are no longer neighbours are stale
+        skeleton = btools.utils.util_skeleton
+        slav = skeleton.SLAV([(0, 0), (0, 4), (4, 4), (4, 0)], [])
+        a, b, c, _ = slav._lavs[0]
+        event = skeleton.EdgeEvent(1.0, skeleton.Point2(2, 2), 1, a, b)
+        self.assertFalse(skeleton._is_stale(event))
+        a.next = c
+        self.assertTrue(skeleton._is_stale(event))
+        # -- unless the queue only checks the vertices, as the default mode does
+        self.assertFalse(skeleton._is_stale(event, neighbours=False))
+
+        # -- almost collinear rectangle, the default mode keeps both hips
+        rect = [
+            (0.0, 0.0), (6.89e-07, 2.0), (5.16e-07, 4.0), (-1.59e-07, 6.0),
+            (-4.82e-07, 8.0), (0.0, 10.0), (4.0, 9.999999977), (8.0, 10.00000019),
+            (12.0, 9.999999432), (16.0, 10.000000393), (20.0, 10.0),
+            (20.000000047, 8.0), (19.999999833, 6.0), (19.999999184, 4.0),
+            (19.999999991, 2.0), (20.0, 0.0), (16.0, -4.36e-07), (12.0, 5.12e-07),
+            (8.0, 2.37e-07), (4.0, -4.99e-07),
+        ]
+        edges = set()
+        for arc in btools.utils.skeletonize(rect, []):
+            source = (round(arc.source.x, 3), round(arc.source.y, 3))
+            for sink in arc.sinks:
+                edges.add(frozenset([source, (round(sink.x, 3), round(sink.y, 3))]))
+        self.assertIn(frozenset([(5, 5), (4, 6)]), edges)
+        self.assertIn(frozenset([(15, 5), (16, 6)]), edges)
+
+        # -- jittered star that left an unclosed lav (and hung) with the old rules,
+        # -- the default mode starts over with the strict ones
+        rnd = random.Random(8)
+        star = []
+        for i in range(100):
+            radius = (10.0 if i % 2 else 4.0) * rnd.uniform(0.9, 1.1)
+            angle = -2 * math.pi * i / 100
+            star.append((radius * math.cos(angle), radius * math.sin(angle)))
+        faces = []
+        self.assertTrue(btools.utils.skeletonize(star, [], faces=faces))
+        self.assertNotIn(None, [face.polygon for face in faces])
+
+    def test_split_event_ties(self):
+        # -- the bisectors of two pieces of an opposite edge enclose a split point,
+        # -- the one the scan over every lav vertex reached first is split
+        rnd = random.Random(9)
+        star = []
+        for i in range(40):
+            radius = (10.0 if i % 2 else 4.0) * rnd.uniform(0.9, 1.1)
+            angle = -2 * math.pi * i / 40
+            star.append((radius * math.cos(angle), radius * math.sin(angle)))
+        skeleton = btools.utils.skeletonize(star, [])
+        self.assertEqual(len(skeleton), 36)
+        self.assertEqual(sum(len(arc.sinks) for arc in skeleton), 68)
+
+    def test_skeletonize_faces(self):
+        points = [(0, 0), (0, 4), (2, 4), (2, 2), (4, 2), (4, 0)]
+        faces = []
+        btools.utils.skeletonize(points, [], faces=faces)
+
+        self.assertEqual(len(faces), len(points))
+        for face in faces:
+            self.assertGreaterEqual(len(face.polygon), 3)
+            # -- face starts with its footprint edge, the rest are skeleton nodes
+            (_, h1), (_, h2) = face.polygon[:2]
+            self.assertEqual((h1, h2), (0.0, 0.0))
+            self.assertTrue(all(h > 0 for _, h in face.polygon[2:]))
+
+    def test_skeletonize_faces_closed(self):
+        # -- all the events of a star meet at its center
+        star = [
+            (r * math.cos(-math.pi * i / 25), r * math.sin(-math.pi * i / 25))
+            for i, r in enumerate([4, 10] * 25)
+        ]
+        comb = [(0, 0), (0, 2), (41, 2), (41, 0)]
+        for t in range(20, 0, -1):
+            comb[2:2] = [(2 * t - 1, 2), (2 * t - 1, 6), (2 * t, 6), (2 * t, 2)]
+
+        for points in (star, comb):
+            faces = []
+            btools.utils.skeletonize(points, [], faces=faces)
+            self.assertEqual(len(faces), len(points))
+            self.assertNotIn(None, [face.polygon for face in faces])
+
+    def test_max_safe_outset(self):
+        # -- U shape with a notch 0.2 wide, the notch closes at an outset of 0.1
+        points = [(0, 0), (0, 4), (1.9, 4), (1.9, 1)]
+        points += [(2.1, 1), (2.1, 4), (4, 4), (4, 0)]
+        self.assertEqual(btools.utils.max_safe_outset(points, 0.05), 0.05)
+
+        outset = btools.utils.max_safe_outset(points, 0.5)
+        self.assertLess(outset, 0.1)
+        self.assertAlmostEqual(outset, 0.1, places=3)